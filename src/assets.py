@@ -0,0 +1,40 @@
+from settings import *
+
+# Paths
+GFX_PATH = join(BASE_PATH, "gfx")
+SFX_PATH = join(BASE_PATH, "sfx")
+
+class Assets:
+    def __init__(self):
+        # Loaded on first use and shared by every game afterwards
+        self.fonts = {}
+        self.sounds = {}
+        self.images = {}
+
+    def font(self, size, name="Russo_One.ttf"):
+        # None is pygame's default font
+        key = (name, size)
+        if key not in self.fonts:
+            self.fonts[key] = pygame.font.Font(join(GFX_PATH, name) if name else None, size)
+        return self.fonts[key]
+
+    def sound(self, name):
+        if name not in self.sounds:
+            self.sounds[name] = pygame.mixer.Sound(join(SFX_PATH, name))
+        return self.sounds[name]
+
+    def image(self, name):
+        # Needs a display mode for convert_alpha
+        if name not in self.images:
+            self.images[name] = pygame.image.load(join(GFX_PATH, name)).convert_alpha()
+        return self.images[name]
+
+    def preload(self):
+        # Load everything up front so the first game doesn't stall on disk
+        for shape in TETROMINOS.keys():
+            self.image(f"{shape}.png")
+        self.image("LOGO.png")
+        self.sound("game-over.mp3")
+        self.sound("next-level.mp3")
+
+assets = Assets()
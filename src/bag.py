@@ -0,0 +1,42 @@
+from settings import *
+
+from random import Random
+from collections import deque
+from itertools import permutations, islice
+
+# Every order of the seven pieces, so refilling a bag is a single random index
+BAG_ORDERS = tuple(permutations(TETROMINOS.keys()))
+
+# Bags generated at once whenever the queue runs dry
+BAG_BATCH = 8
+
+class SevenBag:
+    def __init__(self, seed, preview_size=3):
+        # Own generator, so every game with the same seed deals the same pieces
+        self.seed = seed
+        self.random = Random(seed)
+        self.preview_size = preview_size
+
+        # Upcoming pieces, generated ahead of time
+        self.queue = deque()
+
+    def fill(self, count):
+        # Make sure at least count pieces are queued, a whole number of bags at a time
+        while len(self.queue) < count:
+            randrange = self.random.randrange
+            for i in range(max(BAG_BATCH, (count - len(self.queue)) // 7 + 1)):
+                self.queue.extend(BAG_ORDERS[randrange(len(BAG_ORDERS))])
+
+    def next(self):
+        if len(self.queue) <= self.preview_size:
+            self.fill(self.preview_size + 1)
+        return self.queue.popleft()
+
+    def take(self, count):
+        # The next count pieces in one go
+        self.fill(count)
+        return [self.queue.popleft() for i in range(count)]
+
+    def preview(self):
+        self.fill(self.preview_size)
+        return tuple(islice(self.queue, self.preview_size))
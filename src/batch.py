@@ -0,0 +1,142 @@
+from settings import *
+
+import numpy as np
+
+from bag import SevenBag
+from engine import FULL_MASK
+from pieces import SHAPES, MASKS
+
+# Board rows are stored as unsigned integers, one bit per column
+ROW_TYPE = np.uint16 if COLUMNS <= 16 else np.uint32 if COLUMNS <= 32 else np.uint64
+
+# Spawn position of the pivot block
+SPAWN_X, SPAWN_Y = BLOCK_OFFSET
+
+# Pieces fetched from every game's bag at once
+SEQUENCE_BATCH = 1024
+
+# Piece Tables: indexed by [shape index, rotation], row bits for dy = DY_MIN..DY_MAX
+DY_MIN = min(dy for masks in MASKS.values() for mask in masks for dy, bits in mask[2])
+DY_MAX = max(dy for masks in MASKS.values() for mask in masks for dy, bits in mask[2])
+MIN_X = np.zeros((len(SHAPES), 4), np.int64)
+MAX_X = np.zeros((len(SHAPES), 4), np.int64)
+ROW_BITS = np.zeros((len(SHAPES), 4, DY_MAX - DY_MIN + 1), np.int64)
+for shape_index, shape in enumerate(SHAPES):
+    for rotation, (min_x, max_x, mask_rows) in enumerate(MASKS[shape]):
+        MIN_X[shape_index, rotation] = min_x
+        MAX_X[shape_index, rotation] = max_x
+        for dy, bits in mask_rows:
+            ROW_BITS[shape_index, rotation, dy - DY_MIN] = bits
+
+# Line clear score by number of rows (same table as the scalar rules)
+LINE_SCORES = np.array([0] + [SCORE_DATA[lines] for lines in range(1, 5)], np.int64)
+
+# Padding around the field: empty rows above the spawn, full rows below the floor
+TOP = -(SPAWN_Y + DY_MIN)
+BOTTOM = DY_MAX + 1
+
+class BatchEngine:
+    def __init__(self, seeds):
+        # General
+        self.size = len(seeds)
+        self.games = np.arange(self.size)
+
+        # Fields (padded, so every piece row can be looked up without bounds checks)
+        self.padded = np.zeros((self.size, TOP + ROWS + BOTTOM), ROW_TYPE)
+        self.padded[:, TOP + ROWS:] = np.iinfo(ROW_TYPE).max
+        self.rows = self.padded[:, TOP:TOP + ROWS]
+
+        # Pieces
+        self.bags = [SevenBag(seed) for seed in seeds]
+        self.sequence = None
+        self.sequence_index = SEQUENCE_BATCH
+        self.shapes = self.next_shapes()
+
+        # Score
+        self.score = np.zeros(self.size, np.int64)
+        self.lines = np.zeros(self.size, np.int64)
+        self.level = np.ones(self.size, np.int64)
+        self.locks = np.zeros(self.size, np.int64)
+
+        # Game Over
+        self.game_over = np.zeros(self.size, bool)
+
+    def next_shapes(self):
+        # Every game takes one piece per placement, so a single index walks all sequences
+        if self.sequence_index == SEQUENCE_BATCH:
+            self.sequence = np.array([[SHAPES.index(shape) for shape in bag.take(SEQUENCE_BATCH)] for bag in self.bags], np.int64)
+            self.sequence_index = 0
+        shapes = self.sequence[:, self.sequence_index]
+        self.sequence_index += 1
+        return shapes
+
+    def collisions(self, games, shapes, rotations, xs, ys):
+        # (games, ys) matrix: does the piece overlap the field with its pivot at row y
+        shift = xs + MIN_X[shapes, rotations]
+        collide = np.zeros((len(games), len(ys)), bool)
+        for k, dy in enumerate(range(DY_MIN, DY_MAX + 1)):
+            bits = ROW_BITS[shapes, rotations, k] << shift
+            field_rows = self.padded[games[:, None], ys[None, :] + dy + TOP].astype(np.int64)
+            collide |= (field_rows & bits[:, None]) != 0
+        return collide
+
+    def fits(self, games, shapes, rotations, xs):
+        inside = (xs + MIN_X[shapes, rotations] >= 0) & (xs + MAX_X[shapes, rotations] < COLUMNS)
+        fits = inside.copy()
+        fits[inside] = ~self.collisions(games[inside], shapes[inside], rotations[inside], xs[inside], np.array([SPAWN_Y]))[:, 0]
+        return fits
+
+    def place(self, rotations, xs):
+        # Hard drop every running game's piece from the spawn row at (rotation, x),
+        # a target that doesn't fit drops the piece as it spawned (like Engine.place)
+        games = self.games[~self.game_over]
+        if not len(games):
+            return
+
+        shapes = self.shapes[games]
+        rotations = np.asarray(rotations, np.int64)[games]
+        xs = np.asarray(xs, np.int64)[games]
+
+        fits = self.fits(games, shapes, rotations, xs)
+        rotations = np.where(fits, rotations, 0)
+        xs = np.where(fits, xs, SPAWN_X)
+
+        # Drop: the first colliding row below the spawn, minus one
+        ys = np.arange(SPAWN_Y + 1, ROWS + 1)
+        landing = SPAWN_Y + self.collisions(games, shapes, rotations, xs, ys).argmax(axis=1)
+        drop_distance = landing - SPAWN_Y
+        self.score[games] += (drop_distance * 0.4).astype(np.int64)
+        self.locks[games] += 1
+
+        # Lock
+        shift = xs + MIN_X[shapes, rotations]
+        topped_out = np.zeros(len(games), bool)
+        for k, dy in enumerate(range(DY_MIN, DY_MAX + 1)):
+            bits = ROW_BITS[shapes, rotations, k]
+            rows = landing + dy
+            topped_out |= (bits != 0) & (rows < 0)
+            write = (bits != 0) & (rows >= 0)
+            self.padded[games[write], rows[write] + TOP] |= (bits[write] << shift[write]).astype(ROW_TYPE)
+        self.game_over[games[topped_out]] = True
+        games = games[~topped_out]
+
+        # Line Clears: stable sort full rows to the top, then empty them
+        full = self.rows[games] == FULL_MASK
+        cleared = full.sum(axis=1)
+        clearing = games[cleared > 0]
+        if len(clearing):
+            full = full[cleared > 0]
+            order = np.argsort(~full, axis=1, kind="stable")
+            rows = np.take_along_axis(self.rows[clearing], order, axis=1)
+            rows[np.arange(ROWS)[None, :] < cleared[cleared > 0][:, None]] = 0
+            self.rows[clearing] = rows
+
+        # Score
+        self.lines[games] += cleared
+        self.score[games] += LINE_SCORES[cleared] * self.level[games]
+        self.level[games] += (cleared > 0) & (self.lines[games] >= self.level[games] * 5)
+
+        # Next Piece
+        self.shapes = self.next_shapes()
+        blocked = ~self.fits(games, self.shapes[games], np.zeros(len(games), np.int64), np.full(len(games), SPAWN_X))
+        self.game_over[games[blocked]] = True
@@ -0,0 +1,268 @@
+from settings import *
+
+import os
+import json
+import random
+import platform
+from argparse import ArgumentParser
+from collections import namedtuple
+from sys import exit
+from statistics import median
+from timeit import Timer
+
+# Rendering needs a display surface, a dummy one times the same blits without a window
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+from bag import SevenBag
+from engine import Engine, FULL_MASK, HARD_DROP
+
+# Benchmark Setup
+SEED = 50
+FILL_LEVELS = (0, 0.25, 0.5, 0.75) # Stack height as a fraction of the rows
+ROUNDS = 25 # Each benchmark reports its median round, which slow and quiet stretches of the machine move the least
+ROUND_TIME = 0.02 # Seconds a round runs at least, calls per round are doubled until it does
+
+# One timed call, with the setup that has to run before each call and the number of operations a call does
+Benchmark = namedtuple("Benchmark", ("func", "setup", "per_call"), defaults=(None, 1))
+
+# Baseline
+BASELINE_PATH = join(BASE_PATH, "benchmarks", "baseline.json")
+BASELINE_RUNS = 3 # Suite runs a saved baseline takes the median of, so one unusual run doesn't set the bar
+THRESHOLD = 0.25 # Slowdown over the baseline that counts as a regression
+
+def fill_field(engine, step, fill):
+    # Seeded random hard drops until the stack reaches the fill level
+    rng = random.Random(SEED)
+    engine.gravity.deactivate()
+    while ROWS - min(engine.heights) < fill * ROWS and not engine.game_over:
+        piece = engine.tetromino
+        rotation = rng.randrange(4)
+        x = rng.randrange(COLUMNS)
+        if not engine.collides(piece.shape, rotation, x, piece.y):
+            piece.rotation = rotation
+            piece.x = x
+        step([HARD_DROP])
+
+def make_engine(fill):
+    engine = Engine(SevenBag(SEED).next)
+    fill_field(engine, engine.step, fill)
+    return engine
+
+def snapshot(engine):
+    # The color bytearrays are kept along with their contents, so restoring allocates nothing
+    piece = engine.tetromino
+    return (list(engine.rows), list(engine.colors), [bytes(row) for row in engine.colors], list(engine.heights),
+            engine.field_version, piece, piece.x, piece.y, piece.rotation,
+            engine.current_score, engine.current_lines, engine.current_level)
+
+def restore(engine, state, color_rows=range(ROWS)):
+    # Only the color rows in color_rows get their contents back, the timed call leaves the others alone
+    (rows, colors, contents, heights, engine.field_version, piece, piece.x, piece.y, piece.rotation,
+     engine.current_score, engine.current_lines, engine.current_level) = state
+    engine.rows[:] = rows
+    engine.colors[:] = colors
+    for y in color_rows:
+        colors[y][:] = contents[y]
+    engine.heights[:] = heights
+    engine.tetromino = piece
+    engine.game_over = False
+    engine.events = []
+
+def get_calls(timer):
+    # Calls per round, doubled until a round is long enough that timer overhead and resolution don't show
+    calls = 1
+    while timer.timeit(calls) < ROUND_TIME:
+        calls *= 2
+    return calls
+
+def measure(benchmarks):
+    # Every pass times each benchmark for one round, so a slow stretch of the machine costs many benchmarks
+    # one round each instead of costing a few benchmarks all of theirs
+    prepared = []
+    for name, (func, setup, per_call) in benchmarks.items():
+        if setup:
+            # State has to be reset between calls: setup and call are timed together in batches,
+            # and the setup alone, timed right after, is taken off
+            timers = (Timer(lambda func=func, setup=setup: (setup(), func())), Timer(lambda setup=setup: (setup(), None)))
+        else:
+            timers = (Timer(func),)
+        prepared.append((name, timers, get_calls(timers[0]), per_call))
+
+    rounds = {name: [] for name in benchmarks}
+    for round_index in range(ROUNDS):
+        for name, timers, calls, per_call in prepared:
+            ns = [timer.timeit(calls) / calls * 1e9 for timer in timers]
+            rounds[name].append((ns[0] - ns[1] if len(ns) > 1 else ns[0]) / per_call)
+
+    return {name: median(times) for name, times in rounds.items()}
+
+def bench_engine(fill):
+    # Every benchmark gets its own engine on the same field, so none runs on state another one left behind
+    benchmarks = {}
+
+    engine = make_engine(fill)
+    def move_horizontal(engine=engine):
+        engine.move_horizontal(1)
+        engine.move_horizontal(-1)
+    benchmarks["move_horizontal"] = Benchmark(move_horizontal, per_call=2)
+
+    engine = make_engine(fill)
+    def move_down(engine=engine, piece=engine.tetromino, spawn_y=engine.tetromino.y):
+        # Back to the spawn row every time, so the piece never reaches the stack and locks
+        piece.y = spawn_y
+        engine.move_down()
+    benchmarks["move_down"] = Benchmark(move_down)
+
+    benchmarks["rotate"] = Benchmark(make_engine(fill).rotate)
+
+    engine = make_engine(fill)
+    def get_shadow_positions(engine=engine):
+        engine.shadow_key = None
+        engine.get_shadow_positions()
+    benchmarks["get_shadow_positions"] = Benchmark(get_shadow_positions)
+
+    # The drop itself, Engine.hard_drop is this plus lock
+    benchmarks["get_drop_distance"] = Benchmark(make_engine(fill).get_drop_distance)
+
+    # Locking the piece, already at rest on the stack, into the field, clearing rows it fills and spawning the next piece
+    engine = make_engine(fill)
+    piece = engine.tetromino
+    piece.y += engine.get_drop_distance()
+    rest_state = snapshot(engine)
+    lock_rows = sorted({y for x, y in piece.blocks if y >= 0})
+    benchmarks["lock"] = Benchmark(engine.lock, lambda engine=engine: restore(engine, rest_state, lock_rows))
+
+    # Full rows under the stack for the clear benchmark; clearing only moves color rows around, their contents stay
+    engine = make_engine(fill)
+    full_rows = list(range(ROWS - 4, ROWS))
+    for row in full_rows:
+        engine.rows[row] = FULL_MASK
+    for x, height in enumerate(engine.heights):
+        engine.heights[x] = min(height, full_rows[0])
+    full_state = snapshot(engine)
+    benchmarks["check_finished_rows"] = Benchmark(lambda engine=engine: engine.check_finished_rows(full_rows),
+                                                  lambda engine=engine: restore(engine, full_state, ()))
+    return benchmarks
+
+def make_game(fill, board_renderer=None):
+    from game import Game
+
+    game = Game(SevenBag(SEED).next, lambda lines, score, level: None)
+    game.board_renderer = board_renderer
+    fill_field(game.engine, game.update_engine, fill)
+    game.update_block_positions()
+
+    def draw_game():
+        game.draw()
+        game.dirty_rects.clear()
+    return draw_game
+
+def bench_frames(fill):
+    from score import Score
+    from preview import Preview
+
+    score = Score(10000)
+    score.score, score.lines, score.level = 1234, 56, 7
+    preview = Preview()
+    shapes = ("T", "I", "O")
+
+    def run_score():
+        score.run()
+        score.dirty_rects.clear()
+
+    def run_preview():
+        preview.run(shapes)
+        preview.dirty_rects.clear()
+
+    # Sprite renderer, whatever RENDER_MODE is set to
+    benchmarks = {
+        "Game.draw": Benchmark(make_game(fill)),
+        "Score.run": Benchmark(run_score),
+        "Preview.run": Benchmark(run_preview),
+    }
+
+    # And the surfarray renderer on the same field, when numpy is installed
+    try:
+        from board_render import BoardRenderer
+    except ImportError:
+        return benchmarks
+    benchmarks["Game.draw.surfarray"] = Benchmark(make_game(fill, BoardRenderer()))
+    return benchmarks
+
+def run_benchmarks():
+    pygame.init()
+    pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+    from assets import assets
+    from start_menu import StartMenu
+    assets.preload()
+
+    benchmarks = {}
+    for fill in FILL_LEVELS:
+        for name, benchmark in bench_engine(fill).items():
+            benchmarks[f"engine.{name}[fill={fill}]"] = benchmark
+        for name, benchmark in bench_frames(fill).items():
+            benchmarks[f"frame.{name}[fill={fill}]"] = benchmark
+
+    # The menu doesn't depend on the field
+    random.seed(SEED)
+    benchmarks["frame.StartMenu.run"] = Benchmark(StartMenu(10000).run)
+
+    timings = measure(benchmarks)
+    pygame.quit()
+    return {name: round(ns) for name, ns in timings.items()}
+
+def compare(results, baseline, threshold):
+    # Ratio of every result to its baseline, and the names slower than the threshold allows
+    regressions = []
+    for name, ns in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<48} {ns:>12,} ns  (no baseline)")
+            continue
+        ratio = ns / base
+        flag = ""
+        if ratio > 1 + threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<48} {ns:>12,} ns  {ratio:6.2f}x{flag}")
+    return regressions
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Time the engine and render hot paths and compare them with a baseline")
+    parser.add_argument("--output", default="bench.json", help="results file")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline to compare with")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="allowed slowdown, 0.25 is 25%%")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help=f"store the median of {BASELINE_RUNS} runs (this one included) as the new baseline")
+    args = parser.parse_args()
+
+    results = run_benchmarks()
+    report = {
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "machine": platform.machine(),
+        "results": results,
+    }
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+
+    if args.save_baseline:
+        # One run can still land in an unusually slow or quiet stretch, the middle of several can't
+        runs = [results] + [run_benchmarks() for run in range(BASELINE_RUNS - 1)]
+        report["results"] = {name: round(median(run[name] for run in runs)) for name in results}
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as file:
+            json.dump(report, file, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        exit(0)
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}, run with --save-baseline first")
+        exit(0)
+
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    regressions = compare(results, baseline["results"], args.threshold)
+    print(f"{len(regressions)} regression(s) over {args.threshold:.0%}")
+    exit(1 if regressions else 0)
@@ -0,0 +1,62 @@
+from settings import *
+
+import numpy as np
+
+from pieces import SHAPES
+from game import get_background, get_block_tile, get_shadow_tile
+
+# Palette indices: background, piece colors (the engine's color indices), their shadows,
+# then every one of those again as seen through a grid line
+SHADOW_OFFSET = len(SHAPES)
+LINE_OFFSET = 1 + 2 * len(SHAPES)
+
+class BoardRenderer:
+    def __init__(self, columns=COLUMNS, rows=ROWS, cell_size=CELL_SIZE):
+        self.columns = columns
+        self.rows = rows
+        self.cell_size = cell_size
+        size = (columns * cell_size, rows * cell_size)
+
+        # Palette colors are read back from the tiles the sprite renderer draws, so both match exactly
+        colors = [TETROMINOS[shape]["color"] for shape in SHAPES]
+        tiles = [get_block_tile(color) for color in colors] + [get_shadow_tile(color) for color in colors]
+        background = get_background(columns, rows, cell_size)
+        palette = [background.get_at((1, 1))] + [tile.get_at((1, 1)) for tile in tiles]
+        palette += [background.get_at((cell_size, 1))] + [tile.get_at((0, 1)) for tile in tiles]
+
+        # Board: one palette index per cell, drawn into a palette surface of the field's size
+        self.cells = np.zeros((rows, columns), np.uint8)
+        self.surface = pygame.Surface(size, depth=8)
+        self.surface.set_palette(palette)
+
+    def draw(self, surface, colors, shadow_cells, piece_cells, color_index):
+        # colors: the engine's rows of color indices, cells are (x, y) pairs
+        cells = self.cells
+        cells[:] = np.frombuffer(b"".join(colors), np.uint8).reshape(self.rows, self.columns)
+        for x, y in shadow_cells:
+            if y >= 0:
+                cells[y, x] = SHADOW_OFFSET + color_index
+        for x, y in piece_cells:
+            if y >= 0:
+                cells[y, x] = color_index
+
+        # Scale up by the cell size: widen every row once, then copy it down the cell's pixel rows
+        cell_size = self.cell_size
+        pixels = pygame.surfarray.pixels2d(self.surface).T
+        row_pixels = np.repeat(cells, cell_size, axis=1)
+        for y in range(self.rows):
+            pixels[y * cell_size:(y + 1) * cell_size] = row_pixels[y]
+
+        # Grid lines are the first pixel row and column of every cell, where they cross only once
+        pixels[::cell_size] += LINE_OFFSET
+        pixels[:, ::cell_size] += LINE_OFFSET
+        pixels[::cell_size, ::cell_size] -= LINE_OFFSET
+
+        # The field's own top and left edge has no line over the background, except where the grid lines cross it
+        for edge in (pixels[0], pixels[:, 0]):
+            unlined = edge == LINE_OFFSET
+            unlined[cell_size::cell_size] = False
+            edge[unlined] = 0
+        del edge, unlined, pixels # Views keep the surface locked
+
+        surface.blit(self.surface, (0, 0))
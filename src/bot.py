@@ -0,0 +1,83 @@
+from settings import *
+
+from engine import FULL_MASK
+from search import find_placements
+
+# Weights of the default heuristic: aggregate height, cleared lines, holes, bumpiness
+WEIGHTS = (-0.510066, 0.760666, -0.35663, -0.184483)
+
+def apply_placement(rows, placement):
+    # Field after locking the placement and clearing full rows
+    rows = list(rows)
+    for x, y in placement.cells:
+        rows[y] |= 1 << x
+    kept = [row for row in rows if row != FULL_MASK]
+    lines = ROWS - len(kept)
+    return [0] * lines + kept, lines
+
+def get_features(rows):
+    # Top to bottom: `covered` holds the columns that have a filled cell above the current row
+    heights = [0] * COLUMNS
+    aggregate_height = holes = covered = 0
+    for y, row in enumerate(rows):
+        new = row & ~covered
+        while new:
+            bit = new & -new
+            heights[bit.bit_length() - 1] = ROWS - y
+            new ^= bit
+        holes += bin(covered & ~row).count("1")
+        covered |= row
+        aggregate_height += bin(covered).count("1")
+
+    bumpiness = sum(abs(heights[x] - heights[x + 1]) for x in range(COLUMNS - 1))
+    return aggregate_height, holes, bumpiness
+
+def evaluate(rows, lines, placement):
+    # Default heuristic, higher is better
+    aggregate_height, holes, bumpiness = get_features(rows)
+    return WEIGHTS[0] * aggregate_height + WEIGHTS[1] * lines + WEIGHTS[2] * holes + WEIGHTS[3] * bumpiness
+
+class Bot:
+    def __init__(self, heuristic=evaluate):
+        # Any function of (rows after the placement, cleared lines, placement) -> score
+        self.heuristic = heuristic
+
+        # Placement chosen for the current piece, and the inputs left to get there
+        self.piece = None
+        self.target = None
+        self.inputs = []
+        self.states = []
+        self.expected = None
+
+    def choose(self, engine, placements):
+        best_placement, best_score = None, None
+        for placement in placements:
+            if min(y for x, y in placement.cells) < 0:
+                score = float("-inf") # Locking above the field ends the game
+            else:
+                score = self.heuristic(*apply_placement(engine.rows, placement), placement)
+            if best_score is None or score > best_score:
+                best_placement, best_score = placement, score
+        return best_placement
+
+    def plan(self, engine):
+        # Search from wherever the piece is now and keep the target if it's still reachable
+        placements = find_placements(engine)
+        if engine.tetromino is not self.piece or not any(placement.cells == self.target for placement in placements):
+            self.piece = engine.tetromino
+            self.target = self.choose(engine, placements).cells
+
+        for placement in placements:
+            if placement.cells == self.target:
+                self.inputs = list(placement.inputs)
+                self.states = list(placement.states)
+
+    def next_action(self, engine):
+        # Follow the plan while the piece is where it should be,
+        # plan again for a new piece or once gravity has moved it
+        piece = engine.tetromino
+        if piece is not self.piece or not self.inputs or (piece.x, piece.y, piece.rotation) != self.expected:
+            self.plan(engine)
+
+        self.expected = self.states.pop(0)
+        return self.inputs.pop(0)
@@ -0,0 +1,25 @@
+from settings import *
+
+import math
+
+class SimClock:
+    def __init__(self, tick_rate=TICK_RATE):
+        # Simulation time only moves when the clock is ticked
+        self.tick_rate = tick_rate
+        self.tick_time = 1000 / tick_rate
+        self.ticks = 0
+
+    def now(self):
+        return self.ticks * self.tick_time
+
+    def tick(self, count=1):
+        self.ticks += count
+
+    def get_tick(self, time):
+        # First tick at which now() has reached the given time
+        tick = math.ceil(time / self.tick_time)
+        while tick > 0 and (tick - 1) * self.tick_time >= time:
+            tick -= 1
+        while tick * self.tick_time < time:
+            tick += 1
+        return tick
@@ -0,0 +1,282 @@
+from settings import *
+
+from clock import SimClock
+from scheduler import Scheduler
+from timer import Timer
+from pieces import SHAPES, ORIENTATIONS, MASKS, BOTTOMS, KICKS
+
+# Actions
+LEFT = "left"
+RIGHT = "right"
+ROTATE = "rotate"
+SOFT_DROP = "soft drop"
+DOWN = "down" # Soft drop by exactly one row, for bots
+HARD_DROP = "hard drop"
+
+# Field
+FULL_MASK = (1 << COLUMNS) - 1
+
+class Engine:
+    def __init__(self, get_next_shape, scheduler=None):
+        # Game Connection
+        self.get_next_shape = get_next_shape
+
+        # Clock (every step advances it by one fixed tick) and timers on it
+        self.scheduler = scheduler or Scheduler(SimClock())
+        self.clock = self.scheduler.clock
+
+        # Field (one bitmask per row, bit x set when column x is filled)
+        self.rows = [0] * ROWS
+        self.colors = [bytearray(COLUMNS) for y in range(ROWS)]
+
+        # Skyline (row of the topmost filled cell per column, ROWS when empty)
+        self.heights = [ROWS] * COLUMNS
+        self.field_version = 0
+
+        # Shadow cache, valid until the piece moves or the field changes
+        self.shadow_key = None
+        self.shadow_positions = []
+
+        # Tetromino
+        self.tetromino = Piece(self.get_next_shape())
+
+        # Gravity
+        self.down_speed = UPDATE_START_SPEED
+        self.down_speed_faster = self.down_speed * 0.3
+        self.soft_drop = False
+        self.gravity = Timer(self.scheduler, self.down_speed, True, self.move_down)
+        self.gravity.activate()
+
+        # Score
+        self.current_level = 1
+        self.current_score = 0
+        self.current_lines = 0
+
+        # Game Over
+        self.game_over = False
+
+        # Events produced by the current step, e.g. ("lock", cells)
+        self.events = []
+
+    def step(self, actions=()):
+        self.events = []
+        if self.game_over:
+            return self.events
+
+        self.clock.tick()
+
+        for action in actions:
+            if action == LEFT:
+                self.move_horizontal(-1)
+            elif action == RIGHT:
+                self.move_horizontal(1)
+            elif action == ROTATE:
+                self.rotate()
+            elif action == DOWN:
+                self.move_down()
+            elif action == HARD_DROP:
+                self.hard_drop()
+
+            if self.game_over:
+                return self.events
+
+        # Gravity
+        soft_drop = SOFT_DROP in actions
+        if soft_drop != self.soft_drop:
+            self.soft_drop = soft_drop
+            self.gravity.duration = self.down_speed_faster if soft_drop else self.down_speed
+
+        self.scheduler.update()
+        return self.events
+
+    def place(self, rotation, x):
+        # Put the piece straight into (rotation, x) on its current row and hard drop it,
+        # a target that doesn't fit drops the piece where it is
+        self.events = []
+        if self.game_over:
+            return self.events
+
+        piece = self.tetromino
+        if not self.collides(piece.shape, rotation, x, piece.y):
+            piece.rotation = rotation
+            piece.x = x
+        self.hard_drop()
+        return self.events
+
+    def skip(self, ticks):
+        # Same as `ticks` steps with no input, but the ticks before the next timer is due are jumped over;
+        # stops at that timer's tick, so callers loop until they reach their own next input
+        self.events = []
+        if self.game_over or ticks <= 0:
+            return self.events
+
+        # Soft drop ends on the first step without input, which changes gravity, so that step is a real one
+        if self.soft_drop:
+            return self.step()
+
+        deadline = self.scheduler.next_deadline()
+        if deadline is not None:
+            ticks = min(ticks, max(self.clock.get_tick(deadline) - self.clock.ticks, 1))
+        self.clock.tick(ticks - 1)
+        return self.step()
+
+    # Collisions
+    def collides(self, shape, rotation, x, y):
+        min_x, max_x, mask_rows = MASKS[shape][rotation]
+        if x + min_x < 0 or x + max_x >= COLUMNS:
+            return True
+
+        shift = x + min_x
+        for dy, bits in mask_rows:
+            row = y + dy
+            if row >= ROWS:
+                return True
+            if row >= 0 and self.rows[row] & (bits << shift):
+                return True
+        return False
+
+    def get_drop_distance(self):
+        piece = self.tetromino
+
+        # Above the skyline the drop is the smallest gap over the piece's columns
+        drop_distance = ROWS
+        for dx, dy in BOTTOMS[piece.shape][piece.rotation]:
+            gap = self.heights[piece.x + dx] - 1 - (piece.y + dy)
+            if gap < 0:
+                break
+            drop_distance = min(drop_distance, gap)
+        else:
+            return drop_distance
+
+        # Tucked under an overhang: walk down row by row
+        drop_distance = 0
+        while not self.collides(piece.shape, piece.rotation, piece.x, piece.y + drop_distance + 1):
+            drop_distance += 1
+        return drop_distance
+
+    def get_shadow_positions(self):
+        piece = self.tetromino
+        key = (piece, piece.x, piece.y, piece.rotation, self.field_version)
+        if key != self.shadow_key:
+            drop_distance = self.get_drop_distance()
+            self.shadow_positions = [(x, y + drop_distance) for x, y in piece.blocks]
+            self.shadow_key = key
+        return self.shadow_positions
+
+    # Movement
+    def move_horizontal(self, amount):
+        piece = self.tetromino
+        if not self.collides(piece.shape, piece.rotation, piece.x + amount, piece.y):
+            piece.x += amount
+
+    def move_down(self):
+        piece = self.tetromino
+        if not self.collides(piece.shape, piece.rotation, piece.x, piece.y + 1):
+            piece.y += 1
+        else:
+            self.lock()
+
+    def hard_drop(self):
+        drop_distance = self.get_drop_distance()
+        self.tetromino.y += drop_distance
+
+        # Add bonus points for hard drop
+        self.current_score += int(drop_distance * 0.4)
+        self.events.append(("score", None))
+
+        self.lock()
+
+    def rotate(self):
+        piece = self.tetromino
+        for rotation, kick_x, kick_y in KICKS[piece.shape][piece.rotation]:
+            if not self.collides(piece.shape, rotation, piece.x + kick_x, piece.y + kick_y):
+                piece.rotation = rotation
+                piece.x += kick_x
+                piece.y += kick_y
+                return
+
+    # Locking
+    def lock(self):
+        piece = self.tetromino
+        min_x, max_x, mask_rows = MASKS[piece.shape][piece.rotation]
+        for dy, bits in mask_rows:
+            row = piece.y + dy
+            if row >= 0:
+                self.rows[row] |= bits << (piece.x + min_x)
+
+        blocks = piece.blocks
+        color_index = SHAPES.index(piece.shape) + 1
+        for x, y in blocks:
+            if y >= 0:
+                self.colors[y][x] = color_index
+                if y < self.heights[x]:
+                    self.heights[x] = y
+        self.field_version += 1
+        self.events.append(("lock", blocks))
+
+        for x, y in blocks:
+            if y < 0:
+                self.end_game()
+                return
+
+        self.check_finished_rows([piece.y + dy for dy, bits in mask_rows])
+        self.tetromino = Piece(self.get_next_shape())
+        self.events.append(("spawn", self.tetromino.shape))
+
+        piece = self.tetromino
+        if self.collides(piece.shape, piece.rotation, piece.x, piece.y):
+            self.end_game()
+
+    def end_game(self):
+        self.game_over = True
+        self.gravity.deactivate()
+        self.events.append(("game over", None))
+
+    # Score
+    def check_finished_rows(self, candidate_rows=range(ROWS)):
+        # Only rows touched by the last piece can have become full
+        delete_rows = [row for row in candidate_rows if 0 <= row < ROWS and self.rows[row] == FULL_MASK]
+
+        if delete_rows:
+            # Compact in place: drop the full rows, then pad the top with empty ones
+            for row in reversed(delete_rows):
+                del self.rows[row]
+                del self.colors[row]
+            self.rows[0:0] = [0] * len(delete_rows)
+            self.colors[0:0] = [bytearray(COLUMNS) for row in delete_rows]
+
+            # Cells only move down, so each column's new top is at or below the old one
+            for x, height in enumerate(self.heights):
+                bit = 1 << x
+                while height < ROWS and not self.rows[height] & bit:
+                    height += 1
+                self.heights[x] = height
+            self.events.append(("clear", delete_rows))
+
+            self.calculate_score(len(delete_rows))
+
+    def calculate_score(self, num_lines):
+        self.current_lines += num_lines
+        self.current_score += SCORE_DATA[num_lines] * self.current_level
+
+        if self.current_lines >= self.current_level * 5:
+            self.current_level += 1
+            self.down_speed *= 0.9
+            self.down_speed_faster = self.down_speed * 0.8
+            self.gravity.duration = self.down_speed_faster if self.soft_drop else self.down_speed
+            self.events.append(("level up", self.current_level))
+
+        self.events.append(("score", None))
+
+class Piece:
+    def __init__(self, shape):
+        self.shape = shape
+        self.color = TETROMINOS[shape]["color"]
+
+        # Position of the first block and orientation index
+        self.x, self.y = BLOCK_OFFSET
+        self.rotation = 0
+
+    @property
+    def blocks(self):
+        return [(self.x + x, self.y + y) for x, y in ORIENTATIONS[self.shape][self.rotation]]
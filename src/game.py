@@ -1,391 +1,350 @@
 from settings import *
 
 from timer import Timer
+from text import render_text
+from assets import assets
+from clock import SimClock
+from scheduler import Scheduler
+from engine import Engine, LEFT, RIGHT, ROTATE, SOFT_DROP, HARD_DROP
+from pieces import SHAPES
+
+# Background layers, keyed by (columns, rows, cell size)
+BACKGROUNDS = {}
+
+# Block and shadow tiles, one per color shared by every block
+BLOCK_TILES = {}
+SHADOW_TILES = {}
+
+def draw_grid_lines(surface, columns, rows, cell_size, start=1):
+    # Blend the grid over a surface the way the playfield shows it
+    # (cell tiles start at 0 so their top and left edge carry the line)
+    line_surface = pygame.Surface(surface.get_size())
+    line_surface.fill((0,255,0))
+    line_surface.set_colorkey((0,255,0))
+    line_surface.set_alpha(120)
+
+    for col in range(start, columns):
+        x = col * cell_size
+        pygame.draw.line(line_surface, LINE_COLOR, (x, 0), (x, surface.get_height()), 1)
+
+    for row in range(start, rows):
+        y = row * cell_size
+        pygame.draw.line(line_surface, LINE_COLOR, (0, y), (surface.get_width(), y), 1)
+
+    surface.blit(line_surface, (0, 0))
+
+def get_background(columns=COLUMNS, rows=ROWS, cell_size=CELL_SIZE):
+    key = (columns, rows, cell_size)
+    if key not in BACKGROUNDS:
+        background = pygame.Surface((columns * cell_size, rows * cell_size))
+        background.fill(GRAY)
+        draw_grid_lines(background, columns, rows, cell_size)
+        BACKGROUNDS[key] = background
+    return BACKGROUNDS[key]
+
+def get_block_tile(color):
+    # Cell filled with the piece color, grid line included
+    if color not in BLOCK_TILES:
+        tile = pygame.Surface((CELL_SIZE, CELL_SIZE))
+        tile.fill(color)
+        draw_grid_lines(tile, 1, 1, CELL_SIZE, 0)
+        BLOCK_TILES[color] = tile
+    return BLOCK_TILES[color]
+
+def get_shadow_tile(color):
+    # Shadow cell composited over the background, grid line included
+    if color not in SHADOW_TILES:
+        tile = pygame.Surface((CELL_SIZE, CELL_SIZE))
+        tile.fill(GRAY)
+        color_surface = pygame.Surface((CELL_SIZE, CELL_SIZE))
+        color_surface.fill(color)
+        color_surface.set_alpha(80)
+        tile.blit(color_surface, (0, 0))
+        draw_grid_lines(tile, 1, 1, CELL_SIZE, 0)
+        SHADOW_TILES[color] = tile
+    return SHADOW_TILES[color]
 
 class Game:
-    def __init__(self, get_next_shape, update_score):
+    def __init__(self, get_next_shape, update_score, recorder=None, bot=None, profiler=None):
         # General
         self.surface = pygame.Surface((GAME_WIDTH, GAME_HEIGHT))
         self.display_surface = pygame.display.get_surface()
         self.rect = self.surface.get_rect(topleft=(PADDING, PADDING))
-        self.sprites = pygame.sprite.Group()
+
+        # Dirty Rects (display areas changed since the last frame)
+        self.dirty_rects = []
+        self.drawn_cells = None
+        self.game_over_drawn = False
 
         # Game Connection
-        self.get_next_shape = get_next_shape
         self.update_score = update_score
+        self.recorder = recorder
+        self.bot = bot
+        self.profiler = profiler
+
+        # Background (gray fill and grid, built once per board size)
+        self.background = get_background()
+
+        # Whole-board renderer, whose cost doesn't grow with the number of blocks
+        self.board_renderer = None
+        if RENDER_MODE == "surfarray":
+            from board_render import BoardRenderer
+            self.board_renderer = BoardRenderer()
 
-        # Lines
-        self.line_surface = self.surface.copy()
-        self.line_surface.fill((0,255,0))
-        self.line_surface.set_colorkey((0,255,0))
-        self.line_surface.set_alpha(120)
+        # Clock (fixed simulation steps, caught up from real time every frame)
+        self.clock = SimClock()
+        self.scheduler = Scheduler(self.clock)
+        self.frame_time = 0
+        self.last_update = pygame.time.get_ticks()
 
-        # Tetromino
-        self.field_data = [[0 for x in range(COLUMNS)] for y in range(ROWS)]
-        self.tetromino = Tetromino(
-            self.get_next_shape(),
-            self.sprites,
-            self.create_new_tetromino,
-            self.field_data)
+        # Engine (rules live there, the game only renders from it)
+        self.engine = Engine(get_next_shape, self.scheduler)
+
+        # Tetromino (rendered blocks, indexed like the engine's field)
+        self.field_blocks = [[0 for x in range(COLUMNS)] for y in range(ROWS)]
+        self.tetromino = Tetromino(self.engine.tetromino)
+        self.shifted_rows = 0
 
         # Timer
-        self.down_speed = UPDATE_START_SPEED
-        self.down_speed_faster = self.down_speed * 0.3
-        self.down_pressed = False
         self.timers = {
-            "vertical move": Timer(self.down_speed, True, self.move_down),
-            "horizontal move": Timer(MOVE_WAIT_TIME),
-            "rotate": Timer(ROTATE_WAIT_TIME),
-            "hard_drop": Timer(DROP_WAIT_TIME)
+            "horizontal move": Timer(self.scheduler, MOVE_WAIT_TIME),
+            "rotate": Timer(self.scheduler, ROTATE_WAIT_TIME),
+            "hard_drop": Timer(self.scheduler, DROP_WAIT_TIME),
+            "bot move": Timer(self.scheduler, BOT_MOVE_TIME)
         }
-        self.timers["vertical move"].activate()
-
-        # Score
-        self.current_level = 1
-        self.current_score = 0
-        self.current_lines = 0
 
         # Game Over
         self.game_over = False
-        
+        self.game_over_time = 0
+
         # Input Lock (prevent immediate input on game start)
         self.input_locked = True
-        self.input_lock_timer = Timer(INPUT_LOCK_TIME, False, self.unlock_input)
+        self.input_lock_timer = Timer(self.scheduler, INPUT_LOCK_TIME, False, self.unlock_input)
         self.input_lock_timer.activate()
-        
-        # Paths
-        font_path = join(BASE_PATH, "gfx", "Russo_One.ttf")
-        
-        self.font = pygame.font.Font(font_path, 40)
 
         # Audio
-        self.game_over_sound = pygame.mixer.Sound(join(BASE_PATH, "sfx", "game-over.mp3"))
-        self.next_level_sound = pygame.mixer.Sound(join(BASE_PATH, "sfx", "next-level.mp3"))
-    
+        self.game_over_sound = assets.sound("game-over.mp3")
+        self.next_level_sound = assets.sound("next-level.mp3")
+
     def unlock_input(self):
         self.input_locked = False
 
-    def calculate_score(self, num_lines):
-        self.current_lines += num_lines
-        self.current_score += SCORE_DATA[num_lines] * self.current_level
-
-        if self.current_lines >= self.current_level * 5:
-            self.current_level += 1
-            self.down_speed *= 0.9
-            self.down_speed_faster = self.down_speed * 0.8
-            self.timers["vertical move"].duration = self.down_speed
-            self.next_level_sound.play()
-
-        self.update_score(self.current_lines, self.current_score, self.current_level)
-
-    def create_new_tetromino(self):
-        for block in self.tetromino.blocks:
-            if block.pos.y < 0:
+    def update_engine(self, actions):
+        for event, data in self.engine.step(actions):
+            if event == "lock":
+                self.lock_tetromino(data)
+            elif event == "clear":
+                self.check_finished_rows(data)
+            elif event == "spawn":
+                self.tetromino = Tetromino(self.engine.tetromino)
+            elif event == "level up":
+                self.next_level_sound.play()
+            elif event == "score":
+                self.update_score(self.engine.current_lines, self.engine.current_score, self.engine.current_level)
+            elif event == "game over":
                 self.game_over = True
+                self.game_over_time = pygame.time.get_ticks()
                 self.game_over_sound.play()
                 for timer in self.timers.values():
                     timer.deactivate()
-                return
-
-        self.check_finished_rows()
-        self.tetromino = Tetromino(
-            self.get_next_shape(),
-            self.sprites,
-            self.create_new_tetromino,
-            self.field_data)
-
-        if self.check_game_over():
-            self.game_over = True
-            self.game_over_sound.play()
-            for timer in self.timers.values():
-                timer.deactivate()
-
-    def check_game_over(self):
-        for block in self.tetromino.blocks:
-            if block.pos.y < 0:
-                continue
-            if self.field_data[int(block.pos.y)][int(block.pos.x)]:
-                return True
-        return False
-
-    def timer_update(self):
-        for timer in self.timers.values():
-            timer.update()
-        
-        # Update input lock timer
-        if self.input_locked:
-            self.input_lock_timer.update()
-
-    def move_down(self):
-        self.tetromino.move_down()
-    
-    def hard_drop(self):
-        drop_distance = 0
-        while not self.tetromino.next_move_vertical_collide(self.tetromino.blocks, drop_distance + 1):
-            drop_distance += 1
-        
-        for block in self.tetromino.blocks:
-            block.pos.y += drop_distance
-        
-        # Add bonus points for hard drop
-        self.current_score += int(drop_distance * 0.4)
-        self.update_score(self.current_lines, self.current_score, self.current_level)
-        
-        # Lock the piece
-        for block in self.tetromino.blocks:
-            if block.pos.y >= 0:
-                self.field_data[int(block.pos.y)][int(block.pos.x)] = block
-        self.create_new_tetromino()
-    
-    def get_shadow_positions(self):
-        drop_distance = 0
-        while not self.tetromino.next_move_vertical_collide(self.tetromino.blocks, drop_distance + 1):
-            drop_distance += 1
-        
-        shadow_positions = []
-        for block in self.tetromino.blocks:
-            shadow_pos = pygame.Vector2(block.pos.x, block.pos.y + drop_distance)
-            shadow_positions.append(shadow_pos)
-        
-        return shadow_positions
-        
-    def draw_grid(self):
-        for col in range(1, COLUMNS):
-            x = col * CELL_SIZE
-            pygame.draw.line(self.line_surface, LINE_COLOR, (x, 0), (x, self.surface.get_height()), 1)
-
-        for row in range (1, ROWS):
-            y = row * CELL_SIZE
-            pygame.draw.line(self.line_surface, LINE_COLOR, (0, y), (self.surface.get_width(), y), 1)
-
-        self.surface.blit(self.line_surface, (0, 0))
+
+        if not self.game_over:
+            self.tetromino.sync(self.engine.tetromino)
+
+    def lock_tetromino(self, positions):
+        for block, (x, y) in zip(self.tetromino.blocks, positions):
+            block.move(x, y)
+            if y >= 0:
+                self.field_blocks[y][x] = block
+        self.mark_cells(positions)
+
+    def mark_cells(self, cells):
+        for x, y in cells:
+            if y >= 0:
+                self.dirty_rects.append(pygame.Rect(PADDING + x * CELL_SIZE, PADDING + y * CELL_SIZE, CELL_SIZE, CELL_SIZE))
+
+    def update_drawn_cells(self):
+        # The active piece and its shadow are the only cells that change between locks
+        piece_cells = tuple((block.x, block.y) for block in self.tetromino.blocks)
+        shadow_cells = tuple(self.engine.get_shadow_positions()) if not self.game_over else ()
+        drawn_cells = (piece_cells, shadow_cells)
+
+        if drawn_cells != self.drawn_cells:
+            if self.drawn_cells:
+                for cells in self.drawn_cells:
+                    self.mark_cells(cells)
+            self.mark_cells(piece_cells)
+            self.mark_cells(shadow_cells)
+            self.drawn_cells = drawn_cells
 
     def draw_shadow(self):
-        shadow_positions = self.get_shadow_positions()
-        shadow_surface = pygame.Surface((CELL_SIZE, CELL_SIZE))
-        shadow_surface.fill(self.tetromino.color)
-        shadow_surface.set_alpha(80)
-        
-        for pos in shadow_positions:
-            if pos.y >= 0:
-                rect = shadow_surface.get_rect(topleft=(pos.x * CELL_SIZE, pos.y * CELL_SIZE))
-                self.surface.blit(shadow_surface, rect)
+        shadow_positions = self.engine.get_shadow_positions()
+        shadow_surface = get_shadow_tile(self.tetromino.color)
+
+        for x, y in shadow_positions:
+            if y >= 0:
+                self.surface.blit(shadow_surface, (x * CELL_SIZE, y * CELL_SIZE))
 
     def input(self):
+        actions = []
+
         # Don"t accept input during grace period
         if self.input_locked:
-            return
-            
+            return actions
+
+        # Bot plays instead of the keyboard
+        if self.bot:
+            if not self.timers["bot move"].active:
+                actions.append(self.bot.next_action(self.engine))
+                self.timers["bot move"].activate()
+            return actions
+
         keys = pygame.key.get_pressed()
 
         # Checking Horizontal Movement
         if not self.timers["horizontal move"].active:
             if keys[pygame.K_LEFT]:
-                self.tetromino.move_horizontal(-1)
+                actions.append(LEFT)
                 self.timers["horizontal move"].activate()
             if keys[pygame.K_RIGHT]:
-                self.tetromino.move_horizontal(1)
+                actions.append(RIGHT)
                 self.timers["horizontal move"].activate()
 
         # Check For Rotation
         if not self.timers["rotate"].active:
             if keys[pygame.K_UP]:
-                self.tetromino.rotate()
+                actions.append(ROTATE)
                 self.timers["rotate"].activate()
 
         # Hard Drop with Space
         if not self.timers["hard_drop"].active:
             if keys[pygame.K_SPACE]:
-                self.hard_drop()
+                actions.append(HARD_DROP)
                 self.timers["hard_drop"].activate()
 
         # Down Speedup
-        if not self.down_pressed and keys[pygame.K_DOWN]:
-            self.down_pressed = True
-            self.timers["vertical move"].duration = self.down_speed_faster
-
-        if self.down_pressed and not keys[pygame.K_DOWN]:
-            self.down_pressed = False
-            self.timers["vertical move"].duration = self.down_speed
-
-    def check_finished_rows(self):
-        # Get The Full Row Indexes
-        delete_rows = []
-        for i, row in enumerate(self.field_data):
-            if all(row):
-                delete_rows.append(i)
-
-        if delete_rows:
-            for delete_row in delete_rows:
-                # Delete Full Rows
-                for block in self.field_data[delete_row]:
-                    block.kill()
-
-                # Move Down Blocks
-                for row in self.field_data:
-                    for block in row:
-                        if block and block.pos.y < delete_row:
-                            block.pos.y += 1
-
-            # Rebuild the Field Data
-            self.field_data = [[0 for x in range(COLUMNS)] for y in range(ROWS)]
-            for block in self.sprites:
-                if block.pos.y >= 0:
-                    self.field_data[int(block.pos.y)][int(block.pos.x)] = block
-        
-            # Update Score
-            self.calculate_score(len(delete_rows))
+        if keys[pygame.K_DOWN]:
+            actions.append(SOFT_DROP)
+
+        return actions
+
+    def check_finished_rows(self, delete_rows):
+        # Delete Full Rows
+        for delete_row in reversed(delete_rows):
+            del self.field_blocks[delete_row]
+
+        # Move Down Blocks (positions are refreshed before the next draw)
+        self.field_blocks[0:0] = [[0 for x in range(COLUMNS)] for row in delete_rows]
+        self.shifted_rows = max(self.shifted_rows, delete_rows[-1] + 1)
+
+        # Every row above the last cleared one has moved
+        self.dirty_rects.append(pygame.Rect(PADDING, PADDING, GAME_WIDTH, (delete_rows[-1] + 1) * CELL_SIZE))
+
+    def update_block_positions(self):
+        for y in range(self.shifted_rows):
+            for block in self.field_blocks[y]:
+                if block:
+                    block.move(block.x, y)
+        self.shifted_rows = 0
 
     def run(self):
         # Update
-        if not self.game_over:
-            self.input()
-            self.timer_update()
-            self.sprites.update()
+        current_time = pygame.time.get_ticks()
+        self.frame_time += current_time - self.last_update
+        self.last_update = current_time
+
+        ticks = min(int(self.frame_time // self.clock.tick_time), MAX_FRAME_TICKS)
+        self.frame_time = min(self.frame_time - ticks * self.clock.tick_time, self.clock.tick_time)
+
+        for tick in range(ticks):
+            if self.game_over:
+                break
+            # Engine steps also fire due timers
+            actions = self.input()
+            if self.profiler:
+                self.profiler.mark("input")
+            if self.recorder:
+                self.recorder.record(self.clock.ticks, actions)
+            self.update_engine(actions)
+            if self.profiler:
+                self.profiler.mark("engine")
+
+        if not self.game_over and self.shifted_rows:
+            self.update_block_positions()
+        if self.profiler:
+            self.profiler.mark("blocks")
 
         self.draw()
 
         if self.game_over:
             self.draw_game_over()
+        if self.profiler:
+            self.profiler.mark("game draw")
 
     def draw(self):
-        self.surface.fill(GRAY)
-        
-        # Draw shadow before actual pieces
-        if not self.game_over:
-            self.draw_shadow()
-        
-        self.sprites.draw(self.surface)
+        if self.board_renderer:
+            # Field straight from the engine's color indices, shadow and active piece on top
+            shadow_cells = self.engine.get_shadow_positions() if not self.game_over else ()
+            piece_cells = [(block.x, block.y) for block in self.tetromino.blocks]
+            color_index = SHAPES.index(self.tetromino.shape) + 1
+            self.board_renderer.draw(self.surface, self.engine.colors, shadow_cells, piece_cells, color_index)
+        else:
+            self.surface.blit(self.background, (0, 0))
+
+            # Draw shadow before actual pieces
+            if not self.game_over:
+                self.draw_shadow()
+
+            # Locked blocks, then the active piece, in one call
+            blits = [(block.image, block.rect) for row in self.field_blocks for block in row if block]
+            blits.extend((block.image, block.rect) for block in self.tetromino.blocks)
+            self.surface.blits(blits, False)
 
-        self.draw_grid()
+        self.update_drawn_cells()
         self.display_surface.blit(self.surface, (PADDING, PADDING))
         pygame.draw.rect(self.display_surface, LINE_COLOR, self.rect, 2, 2)
 
     def draw_game_over(self):
-        text_surf = self.font.render("GAME OVER", True, "white")
+        text_surf = render_text("GAME OVER", 40)
         text_rect = text_surf.get_rect(center=(self.surface.get_width() / 2, self.surface.get_height() / 2))
-        
+
         bg_rect = text_rect.inflate(20, 20)
         pygame.draw.rect(self.display_surface, "black", bg_rect.move(PADDING, PADDING))
         pygame.draw.rect(self.display_surface, LINE_COLOR, bg_rect.move(PADDING, PADDING), 2)
-        
+
         self.display_surface.blit(text_surf, text_rect.move(PADDING, PADDING))
 
+        if not self.game_over_drawn:
+            self.dirty_rects.append(self.rect.copy())
+            self.game_over_drawn = True
+
 class Tetromino:
-    def __init__(self, shape, group, create_new_tetromino, field_data):
+    def __init__(self, piece):
         # Setup
-        self.shape = shape
-        self.block_positions = TETROMINOS[shape]["shape"]
-        self.color = TETROMINOS[shape]["color"]
-        self.create_new_tetromino = create_new_tetromino
-        self.field_data = field_data
+        self.shape = piece.shape
+        self.color = piece.color
 
         # Create blocks
-        self.blocks = [Block(group, pos, self.color) for pos in self.block_positions]
-
-    # Collisions
-    def next_move_horizontal_collide(self, blocks, amount):
-        collison_list = [block.horizontal_collide(int(block.pos.x + amount), self.field_data) for block in self.blocks]
-        return True if any(collison_list) else False
-
-    def next_move_vertical_collide(self, blocks, amount):
-        collison_list = [block.vertical_collide(int(block.pos.y + amount), self.field_data) for block in self.blocks]
-        return True if any(collison_list) else False
-
-    # Movement
-    def move_horizontal(self, amount):
-        if not self.next_move_horizontal_collide(self.blocks, amount):
-            for block in self.blocks:
-                block.pos.x += amount
-
-    def move_down(self):
-        if not self.next_move_vertical_collide(self.blocks, 1):
-            for block in self.blocks:
-                block.pos.y += 1
-        else:
-            for block in self.blocks:
-                if block.pos.y >= 0:
-                    self.field_data[int(block.pos.y)][int(block.pos.x)] = block
-            self.create_new_tetromino()
-
-    # Rotate
-    def rotate(self):
-        if self.shape != "O":
-            # Pivot Point
-            pivot_pos = self.blocks[0].pos
-
-            # New Block Position
-            new_block_positions = [block.rotate(pivot_pos) for block in self.blocks]
-
-            # Helper to check collision for a set of positions
-            def check_collision(positions):
-                for pos in positions:
-                    # Horizontal Check
-                    if pos.x < 0 or pos.x >= COLUMNS:
-                        return True
-                    # Vertical / Floor Check
-                    if pos.y >= ROWS:
-                        return True
-                    # Field Check ->  Collision With Other Pieces
-                    if pos.y >= 0 and self.field_data[int(pos.y)][int(pos.x)]:
-                        return True
-                return False
-
-            # 1. Try default rotation
-            if not check_collision(new_block_positions):
-                for i, block in enumerate(self.blocks):
-                    block.pos = new_block_positions[i]
-                return
-
-            # 2. Wall Kicks (Right)
-            positions_right = [pos + pygame.Vector2(1, 0) for pos in new_block_positions]
-            if not check_collision(positions_right):
-                for i, block in enumerate(self.blocks):
-                    block.pos = positions_right[i]
-                return
-
-            # 3. Wall Kicks (Left)
-            positions_left = [pos + pygame.Vector2(-1, 0) for pos in new_block_positions]
-            if not check_collision(positions_left):
-                for i, block in enumerate(self.blocks):
-                    block.pos = positions_left[i]
-                return
-            
-            # 4. Floor Kicks (Up)
-            positions_up = [pos + pygame.Vector2(0, -1) for pos in new_block_positions]
-            if not check_collision(positions_up):
-                for i, block in enumerate(self.blocks):
-                    block.pos = positions_up[i]
-                return
-
-class Block(pygame.sprite.Sprite):
-    def __init__(self, group, pos, color):
-        # General
-        super().__init__(group)
-        self.image = pygame.Surface((CELL_SIZE, CELL_SIZE))
-        self.image.fill(color)
-
-        # Position
-        self.pos = pygame.Vector2(pos) + BLOCK_OFFSET
-        self.rect = self.image.get_rect(topleft = self.pos * CELL_SIZE)
+        self.blocks = [Block(pos, self.color) for pos in piece.blocks]
 
-    def rotate(self, pivot_pos):
-        # Block Rotation Calculation
-        return pivot_pos + (self.pos - pivot_pos).rotate(90)
+    def sync(self, piece):
+        # Follow the engine's active piece
+        for block, (x, y) in zip(self.blocks, piece.blocks):
+            block.move(x, y)
 
-    def horizontal_collide(self, x, field_data):
-        if not 0 <= x < COLUMNS:
-            return True
+class Block:
+    __slots__ = ("x", "y", "image", "rect")
 
-        if self.pos.y >= 0 and field_data[int(self.pos.y)][x]:
-            return True
-
-    def vertical_collide(self, y, field_data):
-        if y >= ROWS:
-            return True
+    def __init__(self, pos, color):
+        # General
+        self.image = get_block_tile(color)
 
-        if y >= 0 and field_data[y][int(self.pos.x)]:
-            return True
+        # Position (cell coordinates, the rect follows only when they change)
+        self.x, self.y = pos
+        self.rect = pygame.Rect(self.x * CELL_SIZE, self.y * CELL_SIZE, CELL_SIZE, CELL_SIZE)
 
-    def update(self):
-        self.rect.topleft = self.pos * CELL_SIZE
+    def move(self, x, y):
+        if x != self.x or y != self.y:
+            self.x = x
+            self.y = y
+            self.rect.topleft = (x * CELL_SIZE, y * CELL_SIZE)
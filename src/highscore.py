@@ -0,0 +1,89 @@
+from settings import *
+
+import os
+from threading import Condition, Thread
+from time import monotonic
+
+# Updates arriving this close together (seconds) are written once
+HIGH_SCORE_WRITE_DELAY = 2
+
+class HighScoreStore:
+    def __init__(self, path=HIGH_SCORE_PATH):
+        self.path = path
+
+        # Latest score not yet on disk (None when there is nothing to write)
+        self.pending = None
+        self.writing = False
+        self.flushing = False
+        self.closed = False
+
+        # Writer thread, so the frame loop never waits on the disk
+        self.condition = Condition()
+        self.thread = Thread(target=self.run, name="high score writer", daemon=True)
+        self.thread.start()
+
+    def load(self):
+        try:
+            with open(self.path, "r") as file:
+                return int(file.read())
+        except (OSError, ValueError):
+            return 0
+
+    def save(self, score):
+        # Only the newest score matters, so updates waiting to be written just replace each other
+        with self.condition:
+            self.pending = score
+            self.condition.notify_all()
+
+    def flush(self, wait=True):
+        # Write now instead of after the delay, e.g. at game over, and wait for it unless asked not to
+        with self.condition:
+            self.flushing = True
+            self.condition.notify_all()
+            if wait:
+                while self.pending is not None or self.writing:
+                    self.condition.wait()
+
+    def close(self):
+        self.flush()
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.thread.join()
+
+    def write(self, score):
+        # Write a temporary file next to the real one and rename it over it,
+        # so a crash leaves either the old score or the new one, never half a file
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w") as file:
+            file.write(str(score))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self.path)
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.pending is None and not self.closed:
+                    self.flushing = False
+                    self.condition.notify_all()
+                    self.condition.wait()
+                if self.pending is None:
+                    return
+
+                # Give further updates a moment to arrive unless a flush is waiting
+                deadline = monotonic() + HIGH_SCORE_WRITE_DELAY
+                while not self.flushing and not self.closed and monotonic() < deadline:
+                    self.condition.wait(deadline - monotonic())
+                score = self.pending
+                self.pending = None
+                self.writing = True
+
+            try:
+                self.write(score)
+            except OSError:
+                pass # A full or read-only disk shouldn't stop the game, the next update tries again
+            finally:
+                with self.condition:
+                    self.writing = False
+                    self.condition.notify_all()
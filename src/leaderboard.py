@@ -0,0 +1,161 @@
+from settings import *
+
+import sqlite3
+from argparse import ArgumentParser
+from collections import namedtuple
+from threading import Condition, Thread
+from time import time, strftime, localtime
+
+# One finished game
+Entry = namedtuple("Entry", ("score", "lines", "level", "duration", "seed", "timestamp"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    score INTEGER NOT NULL,
+    lines INTEGER NOT NULL,
+    level INTEGER NOT NULL,
+    duration REAL NOT NULL,
+    seed INTEGER NOT NULL,
+    timestamp REAL NOT NULL,
+    day TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS games_score ON games (score DESC);
+CREATE INDEX IF NOT EXISTS games_day_score ON games (day, score DESC);
+"""
+
+INSERT = "INSERT INTO games (score, lines, level, duration, seed, timestamp, day) VALUES (?, ?, ?, ?, ?, ?, ?)"
+
+def get_day(timestamp):
+    # Local calendar day, the unit arcade boards reset on
+    return strftime("%Y-%m-%d", localtime(timestamp))
+
+def connect(path):
+    connection = sqlite3.connect(path)
+    # Write-ahead log: recording a game doesn't block readers, and commits only append
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.executescript(SCHEMA)
+    return connection
+
+class Leaderboard:
+    def __init__(self, path=LEADERBOARD_PATH):
+        self.path = path
+
+        # Connection for reads, opened on first use (the game reads its bests before the first frame)
+        self.connection = None
+
+        # Best entries overall and for one day, kept current as games are recorded
+        self.best_entry = None
+        self.best_loaded = False
+        self.day_best = {}
+
+        # Finished games not yet in the database
+        self.pending = []
+        self.writing = False
+        self.closed = False
+
+        # Writer thread with its own connection, so the frame loop never waits on an insert
+        self.condition = Condition()
+        self.thread = Thread(target=self.run, name="leaderboard writer", daemon=True)
+        self.thread.start()
+
+    def connect(self):
+        if self.connection is None:
+            self.connection = connect(self.path)
+        return self.connection
+
+    def flush(self):
+        # Wait until every recorded game is in the database
+        with self.condition:
+            while self.pending or self.writing:
+                self.condition.wait()
+
+    def close(self):
+        # Pending games are written before the thread ends
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.thread.join()
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def record(self, score, lines, level, duration, seed, timestamp=None):
+        timestamp = time() if timestamp is None else timestamp
+        day = get_day(timestamp)
+        entry = Entry(score, lines, level, duration, seed, timestamp)
+        with self.condition:
+            self.pending.append(entry)
+            self.condition.notify_all()
+
+        # Keep the cached bests current instead of querying again
+        if self.best_loaded and (self.best_entry is None or score > self.best_entry.score):
+            self.best_entry = entry
+        if day in self.day_best and (self.day_best[day] is None or score > self.day_best[day].score):
+            self.day_best[day] = entry
+        return entry
+
+    def top(self, count=10, day=None):
+        # Both orderings are served straight from an index
+        if day is None:
+            rows = self.connect().execute(
+                "SELECT score, lines, level, duration, seed, timestamp FROM games ORDER BY score DESC LIMIT ?", (count,))
+        else:
+            rows = self.connect().execute(
+                "SELECT score, lines, level, duration, seed, timestamp FROM games WHERE day = ? ORDER BY score DESC LIMIT ?",
+                (day, count))
+        return [Entry(*row) for row in rows]
+
+    def best(self):
+        if not self.best_loaded:
+            entries = self.top(1)
+            self.best_entry = entries[0] if entries else None
+            self.best_loaded = True
+        return self.best_entry
+
+    def best_of_day(self, day=None):
+        day = day or get_day(time())
+        if day not in self.day_best:
+            entries = self.top(1, day)
+            self.day_best[day] = entries[0] if entries else None
+        return self.day_best[day]
+
+    def run(self):
+        connection = None
+        while True:
+            with self.condition:
+                while not self.pending and not self.closed:
+                    self.condition.wait()
+                if not self.pending:
+                    break
+                entries = self.pending
+                self.pending = []
+                self.writing = True
+
+            try:
+                connection = connection or connect(self.path)
+                with connection:
+                    connection.executemany(INSERT, [(*entry, get_day(entry.timestamp)) for entry in entries])
+            except sqlite3.Error:
+                pass # A locked or read-only database shouldn't stop the game, these games just aren't stored
+            finally:
+                with self.condition:
+                    self.writing = False
+                    self.condition.notify_all()
+
+        if connection is not None:
+            connection.close()
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Show the best recorded games")
+    parser.add_argument("--count", type=int, default=10, help="number of games")
+    parser.add_argument("--day", help="only games from this day (YYYY-MM-DD), 'today' for today")
+    args = parser.parse_args()
+
+    day = get_day(time()) if args.day == "today" else args.day
+    leaderboard = Leaderboard()
+    for rank, entry in enumerate(leaderboard.top(args.count, day), 1):
+        print(f"{rank:>3}. {entry.score:>8} points  {entry.lines:>4} lines  level {entry.level:>2}  "
+              f"{entry.duration:>7.1f}s  seed {entry.seed:<10}  {strftime('%Y-%m-%d %H:%M', localtime(entry.timestamp))}")
+    leaderboard.close()
@@ -1,31 +1,53 @@
 from settings import *
 from sys import exit
 
-from random import shuffle
+from time import strftime
+from random import getrandbits
+from argparse import ArgumentParser
 
 # Components
 from game import Game
 from score import Score
 from preview import Preview
 from start_menu import StartMenu
+from text import render_text
+from assets import assets
+from bag import SevenBag
+from replay import Recorder, ReplayWriter
+from bot import Bot
+from profiler import FrameProfiler
+from highscore import HighScoreStore
+from leaderboard import Leaderboard
 
 class Main:
-    def __init__(self):
+    def __init__(self, bot=False, profile=False, profile_log=None):
         # General
         pygame.init()
         pygame.mixer.init()
         self.display_surface = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
         self.clock = pygame.time.Clock()
         pygame.display.set_caption("Tetris 50")
+        assets.preload()
+
+        # Bot mode (soak tests and attract mode demos: the bot plays, games restart on their own)
+        self.bot = bot
 
         # Game state
-        self.game_state = "menu"  # "menu" or "playing"
+        self.game_state = "playing" if self.bot else "menu"  # "menu" or "playing"
         
-        # High Score
+        # High Score (written behind the game loop's back)
+        self.high_score_store = HighScoreStore()
         self.high_score = self.load_high_score()
         
+        # Leaderboard (every finished game, written in the background)
+        self.leaderboard = Leaderboard()
+
+        # Bests are read once before the first frame, the menu shows the cached entries from then on
+        self.leaderboard.best()
+        self.leaderboard.best_of_day()
+
         # Start Menu
-        self.start_menu = StartMenu(self.high_score)
+        self.start_menu = StartMenu(self.high_score, self.leaderboard)
 
         # Theme Music
         self.music_path = join(BASE_PATH, "sfx", "theme.mp3")
@@ -35,96 +57,157 @@ class Main:
         self.muted = False
         self.paused = False
 
+        # Whole window has to be pushed on the next update
+        self.full_redraw = True
+
+        # Pause Overlay (built once, the pause screen is drawn over the frozen game)
+        self.pause_overlay = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
+        self.pause_overlay.fill((0, 0, 0))
+        self.pause_overlay.set_alpha(150)
+
+        # Frame Profiler (F3 toggles the overlay)
+        self.profiler = FrameProfiler(profile, profile_log)
+
+        # Replays (the newest REPLAY_LIMIT are kept)
+        self.replay_writer = ReplayWriter()
+
         # Components
+        self.recorder = None
         self._reset_game()
         
     def _reset_game(self):
-        self.bag = []
-        self.next_shapes = [self.get_from_bag() for shape in range(3)]
-        self.game = Game(self.get_next_shape, self.update_score)
+        self.save_replay()
+        self.bag = SevenBag(getrandbits(32))
+        # Bot games (attract mode runs them back to back) aren't recorded
+        self.recorder = Recorder(self.bag.seed) if RECORD_REPLAYS and not self.bot else None
+        self.game_recorded = False
+        self.game = Game(self.bag.next, self.update_score, self.recorder, Bot() if self.bot else None, self.profiler)
         self.score = Score(self.high_score)
         self.preview = Preview()
-
+        self.full_redraw = True
 
     def load_high_score(self):
-        try:
-            with open(join(BASE_PATH, "highscore.txt"), "r") as file:
-                return int(file.read())
-        except:
-            return 0
+        return self.high_score_store.load()
 
     def save_high_score(self):
-        with open(join(BASE_PATH, "highscore.txt"), "w") as file:
-            file.write(str(self.high_score))
+        self.high_score_store.save(self.high_score)
 
     def update_score(self, lines, score, level):
         self.score.lines = lines
         self.score.score = score
         self.score.level = level
         
-        if score > self.high_score:
+        # Bot games don't count towards the player's high score
+        if score > self.high_score and not self.bot:
             self.high_score = score
             self.save_high_score()
             self.score.high_score = self.high_score
             self.start_menu.high_score = self.high_score
 
-    def get_from_bag(self):
-        if not self.bag:
-            self.bag = list(TETROMINOS.keys())
-            shuffle(self.bag)
-        return self.bag.pop()
+    def save_replay(self):
+        # Keep the seed and input of every played game for bug reports, written behind the game loop's back
+        if self.recorder and self.game.clock.ticks:
+            name = f"{strftime('%Y%m%d-%H%M%S')}-{self.recorder.seed}.t50r"
+            self.replay_writer.save(name, self.recorder.encode(self.game.engine))
+        self.recorder = None
 
-    def get_next_shape(self):
-        next_shape = self.next_shapes.pop(0)
-        self.next_shapes.append(self.get_from_bag())
-
-        return next_shape
+    def finish_game(self):
+        # Called every frame of the game over screen, the game is stored once
+        self.save_replay()
+        self.high_score_store.flush(False)
+        if not self.game_recorded and not self.bot:
+            engine = self.game.engine
+            self.leaderboard.record(engine.current_score, engine.current_lines, engine.current_level,
+                                    engine.clock.now() / 1000, self.bag.seed)
+            self.game_recorded = True
 
     def draw_pause(self):
         # Overlay
-        overlay = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
-        overlay.fill((0, 0, 0))
-        overlay.set_alpha(150)
-        self.display_surface.blit(overlay, (0, 0))
-        
-        # Font
-        font_path = join(BASE_PATH, "gfx", "Russo_One.ttf")
-        font_large = pygame.font.Font(font_path, 50)
-        font_small = pygame.font.Font(font_path, 24)
+        self.display_surface.blit(self.pause_overlay, (0, 0))
         
         # Text
-        title_surf = font_large.render("PAUSED", True, YELLOW)
+        title_surf = render_text("PAUSED", 50, YELLOW)
         title_rect = title_surf.get_rect(center=(WINDOW_WIDTH/2, WINDOW_HEIGHT/2 - 40))
         self.display_surface.blit(title_surf, title_rect)
         
-        resume_surf = font_small.render("Press ESC to Resume", True, "white")
+        resume_surf = render_text("Press ESC to Resume", 24)
         resume_rect = resume_surf.get_rect(center=(WINDOW_WIDTH/2, WINDOW_HEIGHT/2 + 20))
         self.display_surface.blit(resume_surf, resume_rect)
         
-        quit_surf = font_small.render("Press Q to Main Menu", True, "white")
+        quit_surf = render_text("Press Q to Main Menu", 24)
         quit_rect = quit_surf.get_rect(center=(WINDOW_WIDTH/2, WINDOW_HEIGHT/2 + 55))
         self.display_surface.blit(quit_surf, quit_rect)
 
+    def is_idle(self):
+        # Pause and game over screens don't change until something happens, once they are on the display
+        if self.game_state != "playing" or self.full_redraw:
+            return False
+        return self.paused or (self.game.game_over and self.game.game_over_drawn)
+
+    def get_idle_timeout(self):
+        # Bot games still have to wake up for their restart
+        if self.bot and self.game.game_over and not self.paused:
+            return max(1, BOT_RESTART_TIME - (pygame.time.get_ticks() - self.game.game_over_time))
+        return IDLE_TIMEOUT
+
+    def get_dirty_rects(self):
+        dirty_rects = self.game.dirty_rects + self.score.dirty_rects + self.preview.dirty_rects + self.profiler.dirty_rects
+        self.game.dirty_rects = []
+        self.score.dirty_rects = []
+        self.preview.dirty_rects = []
+        self.profiler.dirty_rects = []
+        return dirty_rects
+
+    def quit(self):
+        self.save_replay()
+        self.replay_writer.close()
+        self.high_score_store.close()
+        self.leaderboard.close()
+        self.profiler.close()
+        pygame.quit()
+        exit()
+
     def run(self):
         while True:
-            for event in pygame.event.get():
+            self.profiler.begin()
+
+            # Idle screens sleep until an event arrives instead of redrawing the same frame,
+            # the sleep is its own stage so the pump after it still counts as events
+            if self.is_idle():
+                event = pygame.event.wait(self.get_idle_timeout())
+                self.profiler.mark("idle")
+                events = [event] + pygame.event.get()
+            else:
+                events = pygame.event.get()
+
+            for event in events:
                 if event.type == pygame.QUIT:
-                    pygame.quit()
-                    exit()
+                    self.quit()
+
+                # Uncovered window areas have to be drawn again
+                if event.type in (pygame.WINDOWEXPOSED, pygame.VIDEOEXPOSE):
+                    self.full_redraw = True
 
                 if event.type == pygame.KEYDOWN:
                     # ESC to pause/resume or exit
                     if event.key == pygame.K_ESCAPE:
                         if self.game_state == "playing":
                             self.paused = not self.paused
+                            self.full_redraw = True
                         else:
-                            pygame.quit()
-                            exit()
+                            self.quit()
+
+                    # F3 to show/hide the frame profiler
+                    elif event.key == pygame.K_F3:
+                        self.profiler.toggle()
+                        self.full_redraw = True
 
                     # Q to quit to menu when paused
                     elif event.key == pygame.K_q and self.paused:
                         self.paused = False
                         self.game_state = "menu"
+                        self.save_replay()
+                        self.high_score_store.flush(False)
                     
                     # Muting/Unmuting Theme
                     elif event.key == pygame.K_m:
@@ -152,9 +235,22 @@ class Main:
                         self.game.timers["horizontal move"].activate()
                         self.game.timers["rotate"].activate()
 
+            # Bot games restart on their own a moment after game over
+            if self.bot and self.game_state == "playing" and self.game.game_over and not self.paused:
+                if pygame.time.get_ticks() - self.game.game_over_time >= BOT_RESTART_TIME:
+                    self._reset_game()
+
+            self.profiler.mark("events")
+
+            # Nothing changed on an idle screen (the profiler overlay still repaints the frame it covers)
+            if self.is_idle() and not self.profiler.enabled:
+                continue
+
             # Display based on game state
             if self.game_state == "menu":
-                if not self.start_menu.run(): # If run() returns False, it means a key was pressed and the menu should exit
+                running = self.start_menu.run()
+                self.profiler.mark("menu")
+                if not running: # If run() returns False, it means a key was pressed and the menu should exit
                     self.game_state = "playing" # Transition to playing state
                     self._reset_game() # Always start a fresh game from menu
                     # Activate timers to prevent immediate input
@@ -163,22 +259,55 @@ class Main:
                     self.game.timers["rotate"].activate()
             else:
                 self.display_surface.fill(GRAY)
-                
+                self.profiler.mark("clear")
+
                 if self.paused:
                     self.game.draw()
+                    self.profiler.mark("game draw")
                     self.score.run()
-                    self.preview.run(self.next_shapes)
+                    self.profiler.mark("score")
+                    self.preview.run(self.bag.preview())
+                    self.profiler.mark("preview")
                     self.draw_pause()
+                    self.profiler.mark("menu")
                 else:
-                    # Components
+                    # Components (the game marks its own stages)
                     self.game.run()
                     self.score.run()
-                    self.preview.run(self.next_shapes)
+                    self.profiler.mark("score")
+                    self.preview.run(self.bag.preview())
+                    self.profiler.mark("preview")
+
+                    if self.game.game_over:
+                        self.finish_game()
+
+            if self.profiler.enabled:
+                self.profiler.draw(self.display_surface)
+                self.profiler.mark("overlay")
 
             # Updating
-            pygame.display.update()
-            self.clock.tick(FPS)
+            if DIRTY_RECTS and self.game_state == "playing" and not self.full_redraw:
+                pygame.display.update(self.get_dirty_rects())
+            else:
+                self.get_dirty_rects()
+                pygame.display.update()
+                self.full_redraw = False
+            self.profiler.mark("display")
+
+            # The menu is animated at its own rate, idle screens already waited for their event
+            if self.is_idle():
+                self.clock.tick()
+            else:
+                self.clock.tick(MENU_FPS if self.game_state == "menu" else FPS)
+            self.profiler.mark("clock")
+            self.profiler.end()
 
 if __name__ == "__main__":
-    main = Main()
+    parser = ArgumentParser(description="Tetris50")
+    parser.add_argument("--bot", action="store_true", help="let the built-in bot play")
+    parser.add_argument("--profile", action="store_true", help="start with the frame profiler shown (F3 toggles it)")
+    parser.add_argument("--profile-log", help="write every profiled frame to this .csv or .jsonl file")
+    args = parser.parse_args()
+
+    main = Main(args.bot, args.profile, args.profile_log)
     main.run()
@@ -0,0 +1,74 @@
+from settings import *
+
+# Piece tables, generated once at import so rotation and collision
+# checks are plain lookups instead of runtime vector math.
+
+SHAPES = tuple(TETROMINOS.keys())
+
+# Default rotation, then wall kicks (right, left) and floor kick (up)
+KICK_OFFSETS = ((0, 0), (1, 0), (-1, 0), (0, -1))
+
+def rotate_offsets(offsets):
+    # 90 degrees around the first block, which sits at (0, 0)
+    return tuple((-y, x) for x, y in offsets)
+
+def build_mask(offsets):
+    # Row bitmasks relative to the leftmost column: (min x, max x, ((dy, bits), ...))
+    min_x = min(x for x, y in offsets)
+    max_x = max(x for x, y in offsets)
+    rows = {}
+    for x, y in offsets:
+        rows[y] = rows.get(y, 0) | 1 << (x - min_x)
+    return min_x, max_x, tuple(sorted(rows.items()))
+
+def normalize(offsets):
+    # Cell set of an orientation with its top left corner moved to (0, 0)
+    min_x = min(x for x, y in offsets)
+    min_y = min(y for x, y in offsets)
+    return frozenset((x - min_x, y - min_y) for x, y in offsets)
+
+# Orientations: ORIENTATIONS[shape][rotation] -> block offsets from the pivot
+ORIENTATIONS = {}
+for shape, data in TETROMINOS.items():
+    offsets = tuple(data["shape"])
+    ORIENTATIONS[shape] = []
+    for rotation in range(4):
+        ORIENTATIONS[shape].append(offsets)
+        if shape != "O":
+            offsets = rotate_offsets(offsets)
+    ORIENTATIONS[shape] = tuple(ORIENTATIONS[shape])
+
+# Masks: MASKS[shape][rotation] -> (min x, max x, row masks)
+MASKS = {shape: tuple(build_mask(offsets) for offsets in orientations) for shape, orientations in ORIENTATIONS.items()}
+
+# Bottoms: BOTTOMS[shape][rotation] -> ((dx, lowest dy), ...) for each column the piece covers
+BOTTOMS = {}
+for shape, orientations in ORIENTATIONS.items():
+    BOTTOMS[shape] = []
+    for offsets in orientations:
+        bottoms = {}
+        for x, y in offsets:
+            bottoms[x] = max(bottoms.get(x, y), y)
+        BOTTOMS[shape].append(tuple(sorted(bottoms.items())))
+    BOTTOMS[shape] = tuple(BOTTOMS[shape])
+
+# Kicks: KICKS[shape][rotation] -> ((new rotation, dx, dy), ...) tried in order
+KICKS = {}
+for shape in SHAPES:
+    if shape == "O":
+        KICKS[shape] = tuple(() for rotation in range(4))
+    else:
+        KICKS[shape] = tuple(
+            tuple(((rotation + 1) % 4, kick_x, kick_y) for kick_x, kick_y in KICK_OFFSETS)
+            for rotation in range(4))
+
+# Rotations with a distinct footprint, for search code that enumerates placements
+DISTINCT_ROTATIONS = {}
+for shape, orientations in ORIENTATIONS.items():
+    seen = set()
+    DISTINCT_ROTATIONS[shape] = []
+    for rotation, offsets in enumerate(orientations):
+        if normalize(offsets) not in seen:
+            seen.add(normalize(offsets))
+            DISTINCT_ROTATIONS[shape].append(rotation)
+    DISTINCT_ROTATIONS[shape] = tuple(DISTINCT_ROTATIONS[shape])
@@ -1,6 +1,6 @@
 from settings import *
 
-from pygame.image import load
+from assets import assets
 
 class Preview:
     def __init__(self):
@@ -10,11 +10,15 @@ class Preview:
         self.display_surface = pygame.display.get_surface()
 
         # Shapes
-        self.shape_surfaces = {shape: load(join(BASE_PATH, "gfx", f"{shape}.png")).convert_alpha() for shape in TETROMINOS.keys()}
+        self.shape_surfaces = {shape: assets.image(f"{shape}.png") for shape in TETROMINOS.keys()}
 
         # Image Position Data
         self.increment_height = self.surface.get_height() / 3
 
+        # Dirty Rects
+        self.dirty_rects = []
+        self.drawn_shapes = None
+
     def display_pieces(self, shapes):
         for i, shape in enumerate(shapes):
             shape_surface = self.shape_surfaces[shape]
@@ -24,7 +28,12 @@ class Preview:
             self.surface.blit(shape_surface, rect)
 
     def run(self, next_shapes):
-        self.surface.fill(GRAY)  
-        self.display_pieces(next_shapes)
+        # Pieces are only drawn again when the queue has moved
+        if next_shapes != self.drawn_shapes:
+            self.surface.fill(GRAY)
+            self.display_pieces(next_shapes)
+            self.dirty_rects.append(self.rect.copy())
+            self.drawn_shapes = next_shapes
+
         self.display_surface.blit(self.surface, self.rect)
         pygame.draw.rect(self.display_surface, LINE_COLOR, self.rect, 2, 2)
@@ -0,0 +1,128 @@
+from settings import *
+
+import csv
+import json
+from collections import deque
+from time import perf_counter
+
+from assets import assets
+from stats import percentile
+
+# Stages of a frame, in the order they run ("idle" is the sleep of a static screen waiting for input,
+# "clear" is the window fill, "menu" is the start menu or the pause screen)
+STAGES = ("idle", "events", "clear", "input", "engine", "blocks", "game draw", "score", "preview", "menu", "overlay", "display", "clock")
+
+# Overlay
+PROFILE_HISTORY = 240 # Frames the percentiles and the graph cover
+PROFILE_REDRAW = 15 # Frames between overlay refreshes, so drawing it costs little itself
+PROFILE_FONT_SIZE = 16
+FRAME_BUDGET = 1000 / FPS
+
+class FrameProfiler:
+    def __init__(self, enabled=False, log_path=None):
+        self.enabled = enabled
+
+        # Current frame: seconds spent per stage, and the time of the last mark
+        self.frame = dict.fromkeys(STAGES, 0.0)
+        self.frame_start = self.last_mark = perf_counter()
+        self.frame_count = 0
+
+        # Milliseconds per stage (and per whole frame) over the last frames
+        self.history = {stage: deque(maxlen=PROFILE_HISTORY) for stage in STAGES + ("frame",)}
+
+        # Overlay
+        self.font = assets.font(PROFILE_FONT_SIZE, None)
+        self.line_height = self.font.get_linesize()
+        self.overlay = None
+        self.rect = pygame.Rect(PADDING, PADDING, 260, self.line_height * (len(STAGES) + 2) + 70)
+        self.dirty_rects = []
+
+        # Log (one record per frame, CSV or JSON lines by file extension)
+        self.log_file = None
+        self.log_writer = None
+        if log_path:
+            self.log_file = open(log_path, "w", newline="")
+            if log_path.endswith(".csv"):
+                self.log_writer = csv.writer(self.log_file)
+                self.log_writer.writerow(("frame",) + STAGES + ("total",))
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        for history in self.history.values():
+            history.clear()
+        self.overlay = None
+        self.begin()
+
+    def begin(self):
+        self.frame = dict.fromkeys(STAGES, 0.0)
+        self.frame_start = self.last_mark = perf_counter()
+
+    def mark(self, stage):
+        # Time since the previous mark went to this stage (stages can run several times a frame)
+        if self.enabled:
+            now = perf_counter()
+            self.frame[stage] += now - self.last_mark
+            self.last_mark = now
+
+    def end(self):
+        if not self.enabled:
+            return
+
+        self.frame_count += 1
+        total = (perf_counter() - self.frame_start) * 1000
+        for stage, seconds in self.frame.items():
+            self.history[stage].append(seconds * 1000)
+        self.history["frame"].append(total)
+
+        if self.log_writer:
+            self.log_writer.writerow([self.frame_count] + [round(self.frame[stage] * 1000, 3) for stage in STAGES] + [round(total, 3)])
+        elif self.log_file:
+            record = {stage: round(seconds * 1000, 3) for stage, seconds in self.frame.items()}
+            record.update(frame=self.frame_count, total=round(total, 3))
+            self.log_file.write(json.dumps(record) + "\n")
+
+    def close(self):
+        if self.log_file:
+            self.log_file.close()
+            self.log_file = None
+            self.log_writer = None
+
+    # Overlay
+    def render_overlay(self):
+        overlay = pygame.Surface(self.rect.size, pygame.SRCALPHA)
+        overlay.fill((0, 0, 0, 190))
+
+        # Percentiles per stage, in milliseconds, in columns since the font isn't monospaced
+        columns = (6, 80, 124, 168, 212)
+        y = 4
+        for x, text in zip(columns, ("ms", "p50", "p95", "p99", "max")):
+            overlay.blit(self.font.render(text, True, YELLOW), (x, y))
+        y += self.line_height
+
+        for stage in STAGES + ("frame",):
+            values = sorted(self.history[stage])
+            if values:
+                overlay.blit(self.font.render(stage, True, "white"), (6, y))
+                for x, p in zip(columns[1:], (50, 95, 99, 100)):
+                    overlay.blit(self.font.render(f"{percentile(values, p):.2f}", True, "white"), (x, y))
+            y += self.line_height
+
+        # Busy time graph (frame minus the clock's wait and the idle sleep), one bar per frame, with the frame budget as a line
+        graph_rect = pygame.Rect(6, y + 6, self.rect.width - 12, self.rect.height - y - 12)
+        frames = [frame - clock - idle for frame, clock, idle in zip(self.history["frame"], self.history["clock"], self.history["idle"])]
+        scale = graph_rect.height / (FRAME_BUDGET * 2)
+        for i, ms in enumerate(frames):
+            x = graph_rect.left + i * graph_rect.width // PROFILE_HISTORY
+            height = min(graph_rect.height, max(1, int(ms * scale)))
+            color = GREEN if ms <= FRAME_BUDGET else RED
+            pygame.draw.line(overlay, color, (x, graph_rect.bottom), (x, graph_rect.bottom - height))
+        budget_y = graph_rect.bottom - int(FRAME_BUDGET * scale)
+        pygame.draw.line(overlay, YELLOW, (graph_rect.left, budget_y), (graph_rect.right, budget_y))
+        return overlay
+
+    def draw(self, surface):
+        # Refreshed every few frames, blitted (and pushed to the display) every frame
+        if self.overlay is None or self.frame_count % PROFILE_REDRAW == 0:
+            self.overlay = self.render_overlay()
+        surface.blit(self.overlay, self.rect)
+        self.dirty_rects.append(self.rect.copy())
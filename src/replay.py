@@ -0,0 +1,223 @@
+from settings import *
+
+import os
+import struct
+from bisect import bisect_left
+from sys import argv, exit
+from threading import Condition, Thread
+
+from bag import SevenBag
+from clock import SimClock
+from scheduler import Scheduler
+from engine import Engine, LEFT, RIGHT, ROTATE, SOFT_DROP, HARD_DROP, DOWN
+
+# File Format
+#   header:  magic, version, seed, tick rate, rows, columns
+#   events:  (tick delta, action mask, repeat count) as varints, mask 0 ends the list
+#   footer:  final tick, score, lines, level and every row mask as varints
+MAGIC = b"T50R"
+VERSION = 2 # Bumped whenever the same seed would deal different pieces
+HEADER = struct.Struct("<4sBQHBB")
+
+# Action bits, in the order the game applies them within a tick
+ACTIONS = (LEFT, RIGHT, ROTATE, HARD_DROP, SOFT_DROP, DOWN)
+ACTION_BITS = {action: 1 << i for i, action in enumerate(ACTIONS)}
+
+def encode_actions(actions):
+    mask = 0
+    for action in actions:
+        mask |= ACTION_BITS[action]
+    return mask
+
+def decode_actions(mask):
+    return [action for action in ACTIONS if mask & ACTION_BITS[action]]
+
+def write_varint(data, value):
+    while value >= 0x80:
+        data.append(value & 0x7F | 0x80)
+        value >>= 7
+    data.append(value)
+
+def read_varint(data, pos):
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+class Recorder:
+    def __init__(self, seed):
+        self.seed = seed
+
+        # Runs of identical input as [first tick, mask, count]
+        self.runs = []
+
+    def record(self, tick, actions):
+        if not actions:
+            return
+
+        mask = encode_actions(actions)
+        if self.runs:
+            last = self.runs[-1]
+            if last[1] == mask and last[0] + last[2] == tick:
+                last[2] += 1
+                return
+        self.runs.append([tick, mask, 1])
+
+    def encode(self, engine):
+        data = bytearray(HEADER.pack(MAGIC, VERSION, self.seed, engine.clock.tick_rate, ROWS, COLUMNS))
+
+        last_tick = 0
+        for tick, mask, count in self.runs:
+            write_varint(data, tick - last_tick)
+            data.append(mask)
+            write_varint(data, count)
+            last_tick = tick + count - 1
+        write_varint(data, 0)
+        data.append(0)
+
+        for value in (engine.clock.ticks, engine.current_score, engine.current_lines, engine.current_level, *engine.rows):
+            write_varint(data, value)
+        return bytes(data)
+
+    def save(self, path, engine):
+        with open(path, "wb") as file:
+            file.write(self.encode(engine))
+
+class ReplayWriter:
+    def __init__(self, directory=REPLAY_PATH, limit=REPLAY_LIMIT):
+        self.directory = directory
+        self.limit = limit
+
+        # Encoded replays not yet on disk, as (file name, data)
+        self.pending = []
+        self.writing = False
+        self.closed = False
+
+        # Writer thread, so the game over frame never waits on the disk
+        self.condition = Condition()
+        self.thread = Thread(target=self.run, name="replay writer", daemon=True)
+        self.thread.start()
+
+    def save(self, name, data):
+        with self.condition:
+            self.pending.append((name, data))
+            self.condition.notify_all()
+
+    def flush(self):
+        # Wait until every saved replay is written
+        with self.condition:
+            while self.pending or self.writing:
+                self.condition.wait()
+
+    def close(self):
+        # Pending replays are written before the thread ends
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.thread.join()
+
+    def write(self, name, data):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(join(self.directory, name), "wb") as file:
+            file.write(data)
+
+        # File names start with the time they were written, so the oldest sort first
+        names = sorted(name for name in os.listdir(self.directory) if name.endswith(".t50r"))
+        for name in names[:max(0, len(names) - self.limit)]:
+            os.remove(join(self.directory, name))
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.pending and not self.closed:
+                    self.condition.wait()
+                if not self.pending:
+                    return
+                name, data = self.pending.pop(0)
+                self.writing = True
+
+            try:
+                self.write(name, data)
+            except OSError:
+                pass # A full or read-only disk shouldn't stop the game, the replay is lost
+            finally:
+                with self.condition:
+                    self.writing = False
+                    self.condition.notify_all()
+
+class Replay:
+    def __init__(self, path):
+        with open(path, "rb") as file:
+            data = file.read()
+
+        magic, version, self.seed, self.tick_rate, rows, columns = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a Tetris50 replay")
+        if (rows, columns) != (ROWS, COLUMNS):
+            raise ValueError(f"{path} was recorded on a {rows}x{columns} field")
+        pos = HEADER.size
+
+        # Events
+        self.inputs = {}
+        tick = 0
+        while True:
+            delta, pos = read_varint(data, pos)
+            mask = data[pos]
+            pos += 1
+            if not mask:
+                break
+            count, pos = read_varint(data, pos)
+            tick += delta
+            actions = decode_actions(mask)
+            for i in range(count):
+                self.inputs[tick + i] = actions
+            tick += count - 1
+
+        # Final State
+        values = []
+        for i in range(4 + ROWS):
+            value, pos = read_varint(data, pos)
+            values.append(value)
+        self.ticks, self.score, self.lines, self.level = values[:4]
+        self.rows = values[4:]
+
+    def play(self):
+        # Feed the inputs back through the rules with no rendering,
+        # jumping over the empty ticks between inputs where no timer is due,
+        # on a clock ticking at the rate the game was recorded at
+        engine = Engine(SevenBag(self.seed).next, Scheduler(SimClock(self.tick_rate)))
+        input_ticks = sorted(self.inputs)
+        while engine.clock.ticks < self.ticks and not engine.game_over:
+            tick = engine.clock.ticks
+            actions = self.inputs.get(tick)
+            if actions:
+                engine.step(actions)
+            else:
+                index = bisect_left(input_ticks, tick)
+                next_input = input_ticks[index] if index < len(input_ticks) else self.ticks
+                engine.skip(min(next_input, self.ticks) - tick)
+        return engine
+
+    def check(self, engine):
+        return (engine.clock.ticks, engine.current_score, engine.current_lines, engine.current_level, engine.rows) == \
+            (self.ticks, self.score, self.lines, self.level, self.rows)
+
+if __name__ == "__main__":
+    if len(argv) < 2:
+        print("Usage: python src/replay.py REPLAY_FILE...")
+        exit(2)
+
+    failed = False
+    for path in argv[1:]:
+        replay = Replay(path)
+        engine = replay.play()
+        matches = replay.check(engine)
+        failed = failed or not matches
+        print(f"{path}: {'OK' if matches else 'MISMATCH'} "
+              f"score {engine.current_score}/{replay.score} lines {engine.current_lines}/{replay.lines} "
+              f"level {engine.current_level}/{replay.level} ticks {engine.clock.ticks}/{replay.ticks}")
+    exit(1 if failed else 0)
@@ -0,0 +1,37 @@
+import heapq
+from itertools import count
+
+class Scheduler:
+    def __init__(self, clock):
+        # General
+        self.clock = clock
+
+        # Deadlines as (time, order, timer); entries of stopped or rescheduled
+        # timers stay in the heap and are skipped when they come up
+        self.queue = []
+        self.order = count()
+
+    def push(self, timer):
+        heapq.heappush(self.queue, (timer.deadline, next(self.order), timer))
+
+    def discard_stale(self):
+        while self.queue and self.queue[0][0] != self.queue[0][2].deadline:
+            heapq.heappop(self.queue)
+
+    def next_deadline(self):
+        self.discard_stale()
+        return self.queue[0][0] if self.queue else None
+
+    def update(self):
+        current_time = self.clock.now()
+        while True:
+            self.discard_stale()
+            if not self.queue or self.queue[0][0] > current_time:
+                return
+
+            timer = heapq.heappop(self.queue)[2]
+            timer.deactivate()
+            if timer.repeated:
+                timer.activate()
+            if timer.func:
+                timer.func()
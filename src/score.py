@@ -1,5 +1,7 @@
 from settings import *
 
+from text import render_text
+
 class Score:
     def __init__(self, high_score=0):
         # General
@@ -7,11 +9,8 @@ class Score:
         self.rect = self.surface.get_rect(bottomright = (WINDOW_WIDTH - PADDING, WINDOW_HEIGHT - PADDING))
         self.display_surface = pygame.display.get_surface()
 
-        # Paths
-        font_path = join(BASE_PATH, "gfx", "Russo_One.ttf")
-
         # Font
-        self.font = pygame.font.Font(font_path, 30)
+        self.font_size = 30
 
         # Increment
         self.increment_height = self.surface.get_height() / 3
@@ -22,26 +21,35 @@ class Score:
         self.lines = 0
         self.high_score = high_score
 
+        # Dirty Rects
+        self.dirty_rects = []
+        self.drawn_state = None
+
     def display_text(self, pos, text, color="white"):
-        text_surface = self.font.render(f"{text[0]}: {text[1]}", True, color)
+        text_surface = render_text(f"{text[0]}: {text[1]}", self.font_size, color)
         text_rect = text_surface.get_rect(center = pos)
         self.surface.blit(text_surface, text_rect)
 
     def run(self):
-        self.surface.fill(GRAY)
-        
         # Determine score color (Gold/Yellow if high score beaten or tied)
         score_color = "white"
         if self.score > 0 and self.score >= self.high_score:
             score_color = YELLOW
 
-        for i, text in enumerate([("Score", self.score), ("Level", self.level), ("Lines", self.lines)]):
-            x = self.surface.get_width() / 2
-            y = self.increment_height / 2 + i * self.increment_height
-            
-            # Apply color only to the Score text
-            color = score_color if text[0] == "Score" else "white"
-            self.display_text((x, y), text, color)
+        # Text is only rendered again when something shown has changed
+        state = (self.score, self.level, self.lines, score_color)
+        if state != self.drawn_state:
+            self.surface.fill(GRAY)
+            for i, text in enumerate([("Score", self.score), ("Level", self.level), ("Lines", self.lines)]):
+                x = self.surface.get_width() / 2
+                y = self.increment_height / 2 + i * self.increment_height
+
+                # Apply color only to the Score text
+                color = score_color if text[0] == "Score" else "white"
+                self.display_text((x, y), text, color)
+
+            self.dirty_rects.append(self.rect.copy())
+            self.drawn_state = state
 
         self.display_surface.blit(self.surface, self.rect)
         pygame.draw.rect(self.display_surface, LINE_COLOR, self.rect, 2, 2)
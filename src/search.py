@@ -0,0 +1,126 @@
+from settings import *
+
+from collections import deque
+from functools import lru_cache
+
+from engine import LEFT, RIGHT, ROTATE, DOWN, HARD_DROP
+from pieces import ORIENTATIONS, MASKS, KICKS
+
+# Searches kept, keyed by field and piece state (bots ask again after every input)
+SEARCH_CACHE_SIZE = 256
+
+class Placement:
+    __slots__ = ("shape", "x", "y", "rotation", "cells", "inputs", "states")
+
+    def __init__(self, shape, x, y, rotation, inputs, states):
+        self.shape = shape
+        self.x = x
+        self.y = y
+        self.rotation = rotation
+
+        # Input sequence and the (x, y, rotation) the piece is in after each input
+        self.inputs = inputs
+        self.states = states
+
+        # Pieces resting on the same cells are the same placement, whatever the rotation
+        self.cells = tuple(sorted((x + dx, y + dy) for dx, dy in ORIENTATIONS[shape][rotation]))
+
+def collides(rows, shape, rotation, x, y):
+    # Same test as Engine.collides, against a tuple of row masks
+    min_x, max_x, mask_rows = MASKS[shape][rotation]
+    if x + min_x < 0 or x + max_x >= COLUMNS:
+        return True
+
+    shift = x + min_x
+    for dy, bits in mask_rows:
+        row = y + dy
+        if row >= ROWS:
+            return True
+        if row >= 0 and rows[row] & (bits << shift):
+            return True
+    return False
+
+def get_path(parents, state):
+    inputs = []
+    states = []
+    resting_state = state
+    while parents[state]:
+        states.append(state)
+        state, action = parents[state]
+        inputs.append(action)
+    inputs.reverse()
+    states.reverse()
+
+    # Straight falls at the end are one hard drop
+    while inputs and inputs[-1] == DOWN:
+        inputs.pop()
+        states.pop()
+    inputs.append(HARD_DROP)
+    states.append(resting_state)
+    return inputs, states
+
+def get_moves(rows, shape, state):
+    x, y, rotation = state
+    moves = []
+    for action, new_x in ((LEFT, x - 1), (RIGHT, x + 1)):
+        if not collides(rows, shape, rotation, new_x, y):
+            moves.append((action, (new_x, y, rotation)))
+    for new_rotation, kick_x, kick_y in KICKS[shape][rotation]:
+        if not collides(rows, shape, new_rotation, x + kick_x, y + kick_y):
+            moves.append((ROTATE, (x + kick_x, y + kick_y, new_rotation)))
+            break
+    return moves
+
+@lru_cache(maxsize=SEARCH_CACHE_SIZE)
+def search(rows, shape, x, y, rotation):
+    # Breadth first over (x, y, rotation), so the first path found to a state is a shortest one
+    start = (x, y, rotation)
+    parents = {start: None}
+    queue = deque([start])
+
+    # Open air above the stack: shift and rotate on the current row only
+    while queue:
+        state = queue.popleft()
+        for action, new_state in get_moves(rows, shape, state):
+            if new_state not in parents:
+                parents[new_state] = (state, action)
+                queue.append(new_state)
+
+    # Then fall straight down to just above the stack, where the same moves are all open too
+    top = next((y for y, row in enumerate(rows) if row), ROWS)
+    for state in list(parents):
+        x, y, rotation = state
+        floor = top - 1 - MASKS[shape][rotation][2][-1][0]
+        while y < floor:
+            parents.setdefault((x, y + 1, rotation), ((x, y, rotation), DOWN))
+            y += 1
+        queue.append((x, y, rotation))
+
+    # Near the stack: also soft drop, which reaches tucks and spins under overhangs.
+    # Every state that can't move down is where a hard drop from it would lock
+    placements = {}
+    while queue:
+        state = queue.popleft()
+        x, y, rotation = state
+
+        moves = get_moves(rows, shape, state)
+        resting = collides(rows, shape, rotation, x, y + 1)
+        if not resting:
+            moves.append((DOWN, (x, y + 1, rotation)))
+
+        for action, new_state in moves:
+            if new_state not in parents:
+                parents[new_state] = (state, action)
+                queue.append(new_state)
+
+        if resting:
+            placement = Placement(shape, x, y, rotation, *get_path(parents, state))
+            if placement.cells not in placements:
+                placements[placement.cells] = placement
+
+    return tuple(placements.values())
+
+def find_placements(engine):
+    # Every resting spot the active piece can reach with the engine's moves, with the inputs to get there
+    piece = engine.tetromino
+    return search(tuple(engine.rows), piece.shape, piece.x, piece.y, piece.rotation)
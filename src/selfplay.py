@@ -0,0 +1,91 @@
+from settings import *
+
+import json
+from array import array
+from argparse import ArgumentParser
+from contextlib import nullcontext
+from multiprocessing import Pool, cpu_count
+from random import getrandbits
+from time import perf_counter
+
+from bag import SevenBag
+from bot import Bot
+from engine import Engine
+from stats import percentile
+
+# Per-game results, in the order they're written
+FIELDS = ("seed", "score", "lines", "level", "pieces", "locks", "duration")
+
+# Percentiles reported for every field
+PERCENTILES = (0, 1, 5, 25, 50, 75, 95, 99, 100)
+
+def play_game(task):
+    # One headless bot game with the normal rules and timing, until game over or the piece cap
+    seed, max_pieces = task
+    engine = Engine(SevenBag(seed).next)
+    bot = Bot()
+    pieces = 1
+    locks = 0
+
+    while not engine.game_over and (not max_pieces or locks < max_pieces):
+        for event, data in engine.step([bot.next_action(engine)]):
+            if event == "lock":
+                locks += 1
+            elif event == "spawn":
+                pieces += 1
+
+    # Duration is game time, not the time it took to simulate
+    return {"seed": seed, "score": engine.current_score, "lines": engine.current_lines, "level": engine.current_level,
+            "pieces": pieces, "locks": locks, "duration": engine.clock.now() / 1000}
+
+def summarize(results):
+    summary = {"games": len(results["score"])}
+    for field in FIELDS[1:]:
+        values = sorted(results[field])
+        summary[field] = {"mean": sum(values) / len(values)}
+        for p in PERCENTILES:
+            summary[field][f"p{p}"] = percentile(values, p)
+    return summary
+
+def run(games, processes, seed, max_pieces, results_path=None, chunk_size=16):
+    # Game i plays seed + i, so a run can be repeated or split across machines
+    tasks = ((seed + i, max_pieces) for i in range(games))
+
+    # Only the numbers are kept (8 bytes each), so a million games fit in memory
+    results = {field: array("d" if field == "duration" else "q") for field in FIELDS[1:]}
+
+    # The results file is closed even when a worker raises
+    with open(results_path, "w") if results_path else nullcontext() as results_file, Pool(processes) as pool:
+        # Results stream back as games finish, in whatever order that is
+        for finished, result in enumerate(pool.imap_unordered(play_game, tasks, chunk_size), 1):
+            for field in FIELDS[1:]:
+                results[field].append(result[field])
+            if results_file:
+                results_file.write(json.dumps(result) + "\n")
+            if finished % max(1, games // 100) == 0 or finished == games:
+                print(f"\r{finished}/{games} games", end="", flush=True)
+    print()
+    return results
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Play headless bot games on every core and report score statistics")
+    parser.add_argument("--games", type=int, default=100, help="number of games")
+    parser.add_argument("--processes", type=int, default=cpu_count(), help="worker processes (default: one per core)")
+    parser.add_argument("--seed", type=int, default=None, help="seed of the first game (default: random)")
+    parser.add_argument("--max-pieces", type=int, default=0, help="end games once this many pieces have locked (default: no limit)")
+    parser.add_argument("--results", help="also write every game's result to this JSON lines file")
+    parser.add_argument("--output", default="selfplay.json", help="aggregate statistics file")
+    args = parser.parse_args()
+
+    seed = args.seed if args.seed is not None else getrandbits(32)
+    start_time = perf_counter()
+    results = run(args.games, args.processes, seed, args.max_pieces, args.results)
+    elapsed = perf_counter() - start_time
+
+    summary = summarize(results)
+    summary.update(seed=seed, max_pieces=args.max_pieces, processes=args.processes, seconds=round(elapsed, 2))
+    with open(args.output, "w") as file:
+        json.dump(summary, file, indent=2)
+
+    print(f"{args.games} games in {elapsed:.1f}s, median score {summary['score']['p50']}, "
+          f"median lines {summary['lines']['p50']}, statistics written to {args.output}")
@@ -1,4 +1,8 @@
-import pygame
+try:
+    import pygame
+except ImportError: # Headless engine runs without pygame
+    pygame = None
+
 from os.path import dirname, abspath, join 
 
 # Base Path
@@ -23,12 +27,25 @@ WINDOW_HEIGHT = GAME_HEIGHT + PADDING * 2
 
 # Game Behaviour 
 FPS = 60
+MENU_FPS = 30 # The start menu's animation is drawn at this rate, gameplay keeps FPS
+IDLE_TIMEOUT = 1000 # Longest sleep (ms) between events on screens that don't change (pause, game over)
+TICK_RATE = 60 # Fixed simulation steps per second
+MAX_FRAME_TICKS = 5 # Steps a slow frame may catch up before time is dropped
+DIRTY_RECTS = True # Only push changed areas of the window to the display
+RENDER_MODE = "sprites" # "sprites" blits every block, "surfarray" draws the field from a color index array (needs numpy)
 UPDATE_START_SPEED = 400
 MOVE_WAIT_TIME = 200
 ROTATE_WAIT_TIME = 200
 DROP_WAIT_TIME = 200
 INPUT_LOCK_TIME = 300
-BLOCK_OFFSET = pygame.Vector2(COLUMNS // 2 - 1, -1)
+RECORD_REPLAYS = True # Save every game's seed and input to REPLAY_PATH
+REPLAY_PATH = join(BASE_PATH, "replays")
+REPLAY_LIMIT = 200 # Newest replays kept, older ones are deleted as new ones are written
+HIGH_SCORE_PATH = join(BASE_PATH, "highscore.txt")
+LEADERBOARD_PATH = join(BASE_PATH, "leaderboard.db")
+BOT_MOVE_TIME = 50 # Delay between the bot's inputs in --bot mode
+BOT_RESTART_TIME = 3000 # Game over screen time before the bot starts a new game
+BLOCK_OFFSET = (COLUMNS // 2 - 1, -1)
 
 # Colors 
 YELLOW      = "#f1e60d"
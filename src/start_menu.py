@@ -3,17 +3,52 @@ from settings import *
 import math
 from random import randint, choice
 
+from text import render_text
+from assets import assets
+
+# Background block images, keyed by (color, size, angle bucket)
+BLOCK_ATLAS = {}
+ANGLE_STEP = 3 # Degrees per bucket, squares repeat every 90 degrees
+BLOCK_SIZES = (20, 25, 30, 35, 40)
+
+# Animation steps per drawn frame, so the menu moves at the same speed at MENU_FPS
+MENU_STEPS = max(1, round(FPS / MENU_FPS))
+
+def get_block_image(color, size, rotation):
+    key = (color, size, rotation % 90 // ANGLE_STEP)
+    if key not in BLOCK_ATLAS:
+        # Create a surface for the block
+        surf = pygame.Surface((size, size), pygame.SRCALPHA)
+
+        # Draw the block with transparency
+        color_with_alpha = (*pygame.Color(color)[:3], 30)
+        pygame.draw.rect(surf, color_with_alpha, surf.get_rect(), border_radius=5)
+        pygame.draw.rect(surf, (*pygame.Color(color)[:3], 80), 
+                       surf.get_rect(), 2, border_radius=5)
+
+        # Rotate the surface
+        BLOCK_ATLAS[key] = pygame.transform.rotate(surf, key[2] * ANGLE_STEP)
+    return BLOCK_ATLAS[key]
+
+class BackgroundBlock:
+    __slots__ = ("x", "y", "color", "speed", "size", "rotation")
+
+    def __init__(self, x, y, color, speed, size, rotation):
+        self.x = x
+        self.y = y
+        self.color = color
+        self.speed = speed
+        self.size = size
+        self.rotation = rotation
+
 class StartMenu:
-    def __init__(self, high_score=0):
+    def __init__(self, high_score=0, leaderboard=None):
         self.display_surface = pygame.display.get_surface()
         self.high_score = high_score
-        
-        # Paths
-        font_path = join(BASE_PATH, "gfx", "Russo_One.ttf")
-        logo_path = join(BASE_PATH, "gfx", "LOGO.png")
+        self.leaderboard = leaderboard
         
         # Load and scale logo
-        self.original_logo = pygame.image.load(logo_path).convert_alpha()
+        self.original_logo = assets.image("LOGO.png")
         self.logo_aspect_ratio = self.original_logo.get_width() / self.original_logo.get_height()
         
         # Scale logo to fit within a portion of the screen width
@@ -29,9 +64,13 @@ class StartMenu:
         
         self.logo = pygame.transform.smoothscale(self.original_logo, (self.logo_width, self.logo_height))
         self.logo_rect = self.logo.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT * 0.3))
+
+        # Logo shadow never changes, so darken it once
+        self.logo_shadow = self.logo.copy()
+        self.logo_shadow.fill((0, 0, 0, 100), special_flags=pygame.BLEND_RGBA_MULT)
         
         # Fonts
-        self.instruction_font = pygame.font.Font(font_path, 24)
+        self.instruction_font_size = 24
         
         # Animation variables
         self.time = 0
@@ -47,6 +86,7 @@ class StartMenu:
         
         # Layout constants (proportional to window size)
         self.high_score_y_ratio = 0.55   # 55% down the screen
+        self.day_best_y_ratio = 0.59     # 59% down the screen
         self.instruction_y_ratio = 0.65  # 65% down the screen
         self.controls_y_ratio = 0.75     # 75% down the screen
         self.control_spacing = 25        # Pixels between control lines
@@ -61,15 +101,8 @@ class StartMenu:
         y = randint(-WINDOW_HEIGHT, 0)
         color = choice(self.colors)
         speed = randint(1, 3)
-        size = randint(20, 40)
-        self.bg_blocks.append({
-            "x": x,
-            "y": y,
-            "color": color,
-            "speed": speed,
-            "size": size,
-            "rotation": randint(0, 360)
-        })
+        size = choice(BLOCK_SIZES)
+        self.bg_blocks.append(BackgroundBlock(x, y, color, speed, size, randint(0, 360)))
     
     def update_background(self):
         # Spawn new blocks periodically
@@ -79,30 +112,19 @@ class StartMenu:
             self.spawn_timer = 0
         
         # Update existing blocks
-        for block in self.bg_blocks[:]:
-            block["y"] += block["speed"]
-            block["rotation"] = (block["rotation"] + 1) % 360
+        for block in self.bg_blocks:
+            block.y += block.speed
+            block.rotation = (block.rotation + 1) % 360
             
-            # Remove blocks that are off screen
-            if block["y"] > WINDOW_HEIGHT + block["size"]:
-                self.bg_blocks.remove(block)
+        # Remove blocks that are off screen
+        self.bg_blocks = [block for block in self.bg_blocks if block.y <= WINDOW_HEIGHT + block.size]
     
     def draw_background_blocks(self):
+        blits = []
         for block in self.bg_blocks:
-            # Create a surface for the block
-            surf = pygame.Surface((block["size"], block["size"]), pygame.SRCALPHA)
-            
-            # Draw the block with transparency
-            color_with_alpha = (*pygame.Color(block["color"])[:3], 30)
-            pygame.draw.rect(surf, color_with_alpha, surf.get_rect(), border_radius=5)
-            pygame.draw.rect(surf, (*pygame.Color(block["color"])[:3], 80), 
-                           surf.get_rect(), 2, border_radius=5)
-            
-            # Rotate the surface
-            rotated_surf = pygame.transform.rotate(surf, block["rotation"])
-            rect = rotated_surf.get_rect(center=(block["x"], block["y"]))
-            
-            self.display_surface.blit(rotated_surf, rect)
+            image = get_block_image(block.color, block.size, block.rotation)
+            blits.append((image, (block.x - image.get_width() // 2, block.y - image.get_height() // 2)))
+        self.display_surface.blits(blits, False)
     
     def draw_logo(self):
         # Subtle floating animation
@@ -112,23 +134,24 @@ class StartMenu:
         
         # Draw shadow
         shadow_offset = 5
-        shadow_surf = self.logo.copy()
-        shadow_surf.fill((0, 0, 0, 100), special_flags=pygame.BLEND_RGBA_MULT)
         shadow_rect = logo_pos.copy()
         shadow_rect.x += shadow_offset
         shadow_rect.y += shadow_offset
-        self.display_surface.blit(shadow_surf, shadow_rect)
+        self.display_surface.blit(self.logo_shadow, shadow_rect)
         
         # Draw logo
         self.display_surface.blit(self.logo, logo_pos)
 
     def draw_high_score(self):
-        if self.high_score > 0:
-            text = f"High Score: {self.high_score}"
-            score_surf = self.instruction_font.render(text, True, YELLOW)
+        # Leaderboard entries are cached there, so this doesn't query every frame
+        best = self.leaderboard.best() if self.leaderboard else None
+        high_score = max(self.high_score, best.score if best else 0)
+        if high_score > 0:
+            text = f"High Score: {high_score}"
+            score_surf = render_text(text, self.instruction_font_size, YELLOW)
             
             # Add a slight shadow/outline
-            outline_surf = self.instruction_font.render(text, True, "black")
+            outline_surf = render_text(text, self.instruction_font_size, "black")
             
             center_pos = (WINDOW_WIDTH // 2, int(WINDOW_HEIGHT * self.high_score_y_ratio))
             rect = score_surf.get_rect(center=center_pos)
@@ -140,6 +163,11 @@ class StartMenu:
             self.display_surface.blit(outline_surf, outline_rect)
             
             self.display_surface.blit(score_surf, rect)
+
+        day_best = self.leaderboard.best_of_day() if self.leaderboard else None
+        if day_best:
+            day_surf = render_text(f"Today's Best: {day_best.score}", 18, (200, 200, 200), None)
+            self.display_surface.blit(day_surf, day_surf.get_rect(center=(WINDOW_WIDTH // 2, int(WINDOW_HEIGHT * self.day_best_y_ratio))))
     
     def draw_instructions(self):
         # Pulsing "Press Any Key" text
@@ -147,7 +175,7 @@ class StartMenu:
         alpha = int(150 + pulse * 105)
         
         instruction_text = "Press Any Key To Start"
-        instruction_surf = self.instruction_font.render(instruction_text, True, "white")
+        instruction_surf = render_text(instruction_text, self.instruction_font_size)
         instruction_surf.set_alpha(alpha)
         instruction_rect = instruction_surf.get_rect(center=(WINDOW_WIDTH // 2, int(WINDOW_HEIGHT * self.instruction_y_ratio)))
         self.display_surface.blit(instruction_surf, instruction_rect)
@@ -165,9 +193,8 @@ class StartMenu:
             "ESC : Pause / Exit"
         ]
         
-        small_font = pygame.font.Font(None, 20)
         for i, text in enumerate(controls):
-            control_surf = small_font.render(text, True, (200, 200, 200))
+            control_surf = render_text(text, 20, (200, 200, 200), None)
             control_surf.set_alpha(controls_alpha)
             control_rect = control_surf.get_rect(center=(WINDOW_WIDTH // 2, controls_y + i * self.control_spacing))
             self.display_surface.blit(control_surf, control_rect)
@@ -177,18 +204,16 @@ class StartMenu:
         credits_y = int(WINDOW_HEIGHT * self.credits_y_ratio)
         credits_alpha = min(255, int(self.time * 2))
         
-        small_font = pygame.font.Font(None, 18)
-        
         # Creator name
         credit_text = "By: Anindya Adi Chowdhury"
-        credit_surf = small_font.render(credit_text, True, (180, 180, 180))
+        credit_surf = render_text(credit_text, 18, (180, 180, 180), None)
         credit_surf.set_alpha(credits_alpha)
         credit_rect = credit_surf.get_rect(center=(WINDOW_WIDTH // 2, credits_y))
         self.display_surface.blit(credit_surf, credit_rect)
         
         # CS50x Final Project
         project_text = "CS50x Final Project"
-        project_surf = small_font.render(project_text, True, (150, 150, 150))
+        project_surf = render_text(project_text, 18, (150, 150, 150), None)
         project_surf.set_alpha(credits_alpha)
         project_rect = project_surf.get_rect(center=(WINDOW_WIDTH // 2, credits_y - 18))
         self.display_surface.blit(project_surf, project_rect)
@@ -214,8 +239,9 @@ class StartMenu:
     
     def run(self):
         # Update animations
-        self.time += 1
-        self.update_background()
+        for step in range(MENU_STEPS):
+            self.time += 1
+            self.update_background()
         
         # Draw everything
         self.display_surface.fill(GRAY)
@@ -0,0 +1,5 @@
+import math
+
+def percentile(values, p):
+    # Nearest rank on sorted values: the smallest value with at least p% of the values at or below it
+    return values[max(0, math.ceil(p * len(values) / 100) - 1)]
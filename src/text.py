@@ -0,0 +1,32 @@
+from settings import *
+
+from collections import OrderedDict
+
+from assets import assets
+
+# Font
+FONT = "Russo_One.ttf"
+
+# Cache Size (rendered strings kept before the least recently used is dropped)
+TEXT_CACHE_SIZE = 128
+
+class TextCache:
+    def __init__(self, max_size=TEXT_CACHE_SIZE):
+        self.max_size = max_size
+        self.surfaces = OrderedDict()
+
+    def render(self, text, size, color="white", font=FONT):
+        # Returned surfaces are shared, so callers that change their alpha set it before every blit
+        key = (font, size, text, color)
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = assets.font(size, font).render(text, True, color)
+            self.surfaces[key] = surface
+            if len(self.surfaces) > self.max_size:
+                self.surfaces.popitem(last=False)
+        else:
+            self.surfaces.move_to_end(key)
+        return surface
+
+text_cache = TextCache()
+render_text = text_cache.render
@@ -1,30 +1,35 @@
-from pygame.time import get_ticks
-
 class Timer:
-    def __init__(self, duration, repeated = False, func = None):
+    def __init__(self, scheduler, duration, repeated = False, func = None):
         # General
+        self.scheduler = scheduler
         self.repeated = repeated
         self.func = func
-        self.duration = duration
+        self._duration = duration
 
         self.start_time = 0
-        self.active = False
+        self.deadline = None
+
+    @property
+    def active(self):
+        return self.deadline is not None
+
+    @property
+    def duration(self):
+        return self._duration
+
+    @duration.setter
+    def duration(self, duration):
+        # A running timer keeps its start time and moves its deadline
+        self._duration = duration
+        if self.active:
+            self.deadline = self.start_time + duration
+            self.scheduler.push(self)
 
     def activate(self):
-        self.active = True
-        self.start_time = get_ticks()
+        self.start_time = self.scheduler.clock.now()
+        self.deadline = self.start_time + self._duration
+        self.scheduler.push(self)
         
     def deactivate(self):
-        self.active = False
         self.start_time = 0
-
-    def update(self):
-        current_time = get_ticks()
-        if current_time - self.start_time >= self.duration and self.active:
-            if self.func and self.start_time != 0:
-                self.func()
-
-            self.deactivate()
-
-            if self.repeated:
-                self.activate()
+        self.deadline = None